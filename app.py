@@ -1,13 +1,16 @@
-import random
-import unicodedata
 import pandas as pd
 import streamlit as st
-from streamlit.components.v1 import html
-import altair as alt
-import json
 import os
 from datetime import datetime
 
+from history import ATTEMPT_FIELDS
+from instrumentation import TRACER
+from progress_store import make_progress_store
+from quiz_engine import ConjugationTable, QuizSession, shared_table
+
+# Tiempos de este rerun (solo si el panel de debug de la sidebar está activo)
+TRACER.begin_rerun(st.session_state.get("debug_panel", False))
+
 # ============================================================
 #                 CONFIGURACIÓN DE PÁGINA
 # ============================================================
@@ -21,237 +24,80 @@ st.set_page_config(
 # ============================================================
 #                   CARGAR CSS EXTERNO
 # ============================================================
+@st.cache_resource
+def load_asset(path: str) -> str:
+    """Lee una sola vez (por proceso) un archivo estático (CSS/HTML)."""
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
 try:
-    with open("style.css", encoding="utf-8") as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-        # Faja superior tipo bandera italiana (si existe en tu CSS)
-        st.markdown("<div class='italian-flag-global'></div>", unsafe_allow_html=True)
+    st.markdown(f"<style>{load_asset('style.css')}</style>", unsafe_allow_html=True)
+    # Faja superior tipo bandera italiana (si existe en tu CSS)
+    st.markdown("<div class='italian-flag-global'></div>", unsafe_allow_html=True)
 except Exception as e:
     st.error(f"⚠️ Error cargando style.css: {e}")
 
 # ============================================================
-#                     CARGA DE CSV
+#           TABLA DE CONJUGACIONES (UNA POR PROCESO)
 # ============================================================
-@st.cache_data
-def load_data(path: str = "conjugazioni.csv") -> pd.DataFrame:
-    return pd.read_csv(path)
-
-df = load_data()
-
-# ============================================================
-#      LIMPIEZA DEL CSV + ORDEN DE PRONOMBRES
-# ============================================================
-
-PRON_ORDER = ["Io", "Tu", "Lui", "Lei", "Noi", "Voi", "Loro"]
-
-# Eliminar femenino (como venías usando)
-df = df[df["Genere"] != "F"].copy()
-# Eliminar pronombre Lei
-df = df[df["Pronombre"] != "Lei"].copy()
+@st.cache_resource
+def load_table(path: str = "conjugazioni.csv", verbs_path: str = "verbi.txt") -> ConjugationTable:
+    """
+    Tabla limpia + índice + corrector, construida una sola vez por servidor y
+    compartida (de solo lectura) por todas las sesiones: ningún rerun copia
+    ni vuelve a limpiar el dataset.
+    """
+    return shared_table(path, verbs_path)
 
-df["Pronombre"] = pd.Categorical(df["Pronombre"], categories=PRON_ORDER, ordered=True)
 
-for col in ["Modo", "Tiempo", "Nombre", "Pronombre", "Genere"]:
-    df[col] = df[col].astype(str).str.strip()
+with TRACER.span("load_table"):
+    # CONJUGATIONS_PATH puede apuntar a un .bundle compilado con build_bundle.py
+    table = load_table(os.environ.get("CONJUGATIONS_PATH", "conjugazioni.csv"))
+index = table.index
 
-# ============================================================
-#                        VERBOS
-# ============================================================
-# Asegurate que estas columnas existan en el CSV
-VERB_COLUMNS = {
-    "essere": "essere",
-    "avere": "avere",
-    "mangiare": "mangiare",
-    "credere": "credere",
-    "dormire": "dormire",
-}
+# Opciones de los filtros (verbos en el orden del dataset)
+VERBS = table.verbs
+MODI = table.modes
+TEMPI = table.tiempos
+NOMI = table.nombres
+PRONOMI = table.pronouns
 
 # ============================================================
 #                 FUNCIONES AUXILIARES
 # ============================================================
-def normalize(text: str) -> str:
-    """Normaliza texto para comparar acentos y mayúsculas/minúsculas."""
-    text = str(text).strip()
-    text = unicodedata.normalize("NFD", text)
-    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
-    return text.lower()
-
-
-def load_progress() -> None:
-    """Carga el progreso desde un JSON local, si existe."""
-    if os.path.exists("progress.json"):
-        try:
-            with open("progress.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-            for k, v in data.items():
-                st.session_state[k] = v
-        except Exception:
-            pass
-
-
-def save_progress() -> None:
-    """Guarda el progreso en un JSON local."""
-    data = {
-        "score": st.session_state.get("score", 0),
-        "questions": st.session_state.get("questions", 0),
-        "session_corrects": st.session_state.get("session_corrects", []),
-        "session_errors": st.session_state.get("session_errors", []),
-        "repeat_queue": st.session_state.get("repeat_queue", []),
-        "all_done": st.session_state.get("all_done", False),
-        "selected_verbs": st.session_state.get("selected_verbs", []),
-        "selected_modes": st.session_state.get("selected_modes", []),
-        "selected_tiempos": st.session_state.get("selected_tiempos", []),
-        "selected_nombre": st.session_state.get("selected_nombre", "Tutti"),
-        "selected_genere": st.session_state.get("selected_genere", "Ambos"),
-    }
-    try:
-        with open("progress.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-
-
-# ============================================================
-#               FUNCIÓN PARA NUEVA PREGUNTA
-# ============================================================
-def new_question() -> None:
+def current_user() -> str:
     """
-    Genera una nueva pregunta según los filtros actuales.
-    - Respeta filtros (modo, tempo, nome, genere)
-    - Usa cola de repetición si hay
-    - Evita repeticiones inmediatas, pero permite re-practicar combinaciones ya vistas
+    Clave del alumno: ``?user=`` en la URL. Sin parámetro es ``default``, que
+    usa el ``progress.json`` de siempre (uso local de un solo alumno).
     """
-    df_filtered = df.copy()
+    return st.query_params.get("user") or "default"
 
-    # filtros de sesión (Allenamento)
-    if st.session_state.get("selected_modes"):
-        df_filtered = df_filtered[df_filtered["Modo"].isin(st.session_state["selected_modes"])]
 
-    if st.session_state.get("selected_tiempos"):
-        df_filtered = df_filtered[df_filtered["Tiempo"].isin(st.session_state["selected_tiempos"])]
+def get_progress_store():
+    """Store de progreso de la sesión (``PROGRESS_STORE``: "journal", "json" o "sqlite")."""
+    return make_progress_store(
+        os.environ.get("PROGRESS_STORE", "journal"),
+        path=os.environ.get("PROGRESS_PATH"),
+        user=current_user(),
+    )
 
-    if st.session_state.get("selected_nombre") and st.session_state["selected_nombre"] != "Tutti":
-        df_filtered = df_filtered[df_filtered["Nombre"] == st.session_state["selected_nombre"]]
 
-    if st.session_state.get("selected_genere") and st.session_state["selected_genere"] != "Ambos":
-        df_filtered = df_filtered[df_filtered["Genere"] == st.session_state["selected_genere"]]
+# Storico: columnas de la tabla rápida y ventanas de filas visibles
+QUICK_COLUMNS = ["verb", "modo", "tiempo", "nombre", "pronombre", "provided", "correct"]
+HISTORY_WINDOW = 50
+HISTORY_WINDOWS = {"Ultime 50": 50, "Ultime 200": 200, "Ultime 1000": 1000, "Tutte": None}
 
-    if df_filtered.empty:
-        st.session_state["question"] = None
-        return
 
-    # Set de combos ya respondidas correctamente (se mantiene para registro,
-    # pero ya no se usa para excluir permanentemente preguntas)
-    answered = set()
-    for c in st.session_state.get("session_corrects", []):
-        answered.add(
-            (c.get("tiempo"), c.get("nombre"), c.get("modo"), c.get("pronombre"), c.get("verb"))
-        )
+@TRACER.timed("history_frame")
+def history_frame(key: str, columns: list, last: int = None) -> pd.DataFrame:
+    """Tabla de ``session_corrects``/``session_errors`` (cacheada por el propio historial)."""
+    return getattr(quiz, key).frame(columns, last)
 
-    # ---------- 1) Priorizar preguntas en cola de repetición ----------
-    now_q = st.session_state.get("questions", 0)
-    repeat_item = None
-    queue = list(st.session_state.get("repeat_queue", []))
-    for i, it in enumerate(queue):
-        if it.get("scheduled_at", 0) > now_q:
-            continue
-        # No descartamos items de la cola solo porque hayan sido contestados
-        # anteriormente en la sesión; esto permite re-practicar verbos/tiempos.
-        key = (it.get("tiempo"), it.get("nombre"), it.get("modo"), it.get("pronombre"), it.get("verb"))
-
-        mask = (
-            (df_filtered["Tiempo"] == it["tiempo"])
-            & (df_filtered["Nombre"] == it["nombre"])
-            & (df_filtered["Modo"] == it["modo"])
-            & (df_filtered["Pronombre"] == it["pronombre"])
-            & (df_filtered["Genere"] == it.get("genere", "M"))
-        )
-        candidates = df_filtered[mask]
-        if not candidates.empty:
-            repeat_item = it
-            try:
-                st.session_state["repeat_queue"].pop(i)
-                save_progress()
-            except Exception:
-                pass
-            break
-
-    if repeat_item:
-        mask = (
-            (df_filtered["Tiempo"] == repeat_item["tiempo"])
-            & (df_filtered["Nombre"] == repeat_item["nombre"])
-            & (df_filtered["Modo"] == repeat_item["modo"])
-            & (df_filtered["Pronombre"] == repeat_item["pronombre"])
-            & (df_filtered["Genere"] == repeat_item.get("genere", "M"))
-        )
-        r = df_filtered[mask].sample(1).iloc[0]
-        st.session_state["question"] = {
-            "tiempo": repeat_item["tiempo"],
-            "nombre": repeat_item["nombre"],
-            "modo": repeat_item["modo"],
-            "pronombre": repeat_item["pronombre"],
-            "verb": repeat_item.get(
-                "verb",
-                random.choice(st.session_state.get("selected_verbs", list(VERB_COLUMNS.keys()))),
-            ),
-            "correct": repeat_item.get("correct"),
-            "genere": repeat_item.get("genere", "M"),
-            "is_repeat": True,
-        }
-        st.session_state["feedback"] = ""
-        st.session_state["validated"] = False
-        return
-
-    # ---------- 2) Pregunta aleatoria normal ----------
-    max_attempts = 200
-    attempt = 0
-    chosen = None
-    selected_verbs = st.session_state.get("selected_verbs") or list(VERB_COLUMNS.keys())
-    last_qs = set(st.session_state.get("last_questions", []))
-
-    while attempt < max_attempts:
-        r = df_filtered.sample(1).iloc[0]
-        for verb in random.sample(list(selected_verbs), k=len(selected_verbs)):
-            key = (r.get("Tiempo"), r.get("Nombre"), r.get("Modo"), r.get("Pronombre"), verb)
-            if key in last_qs:
-                continue
-            chosen = (r, verb)
-            break
-        if chosen:
-            break
-        attempt += 1
-
-    if not chosen:
-        st.session_state["question"] = None
-        st.session_state["all_done"] = True
-        return
-
-    r, verb = chosen
-    col = VERB_COLUMNS[verb]
-
-    st.session_state["question"] = {
-        "tiempo": r["Tiempo"],
-        "nombre": r["Nombre"],
-        "modo": r["Modo"],
-        "pronombre": r["Pronombre"],
-        "verb": verb,
-        "correct": r[col],
-        "genere": r["Genere"],
-        "is_repeat": False,
-    }
-
-    last = st.session_state.setdefault("last_questions", [])
-    last.append(
-        (
-            st.session_state["question"]["tiempo"],
-            st.session_state["question"]["nombre"],
-            st.session_state["question"]["modo"],
-            st.session_state["question"]["pronombre"],
-            st.session_state["question"]["verb"],
-        )
-    )
-    if len(last) > 50:
-        st.session_state["last_questions"] = last[-50:]
+
+def new_question() -> None:
+    """Pide al motor la siguiente pregunta y limpia el feedback de la anterior."""
+    quiz.next_question()
     st.session_state["feedback"] = ""
     st.session_state["validated"] = False
 
@@ -259,54 +105,29 @@ def new_question() -> None:
 # ============================================================
 #               INICIALIZACIÓN DE ESTADO
 # ============================================================
-if "score" not in st.session_state:
-    st.session_state["score"] = 0
-    st.session_state["questions"] = 0
-
-if "selected_verbs" not in st.session_state:
-    st.session_state["selected_verbs"] = random.sample(list(VERB_COLUMNS.keys()), k=len(VERB_COLUMNS))
-
-if "selected_modes" not in st.session_state:
-    st.session_state["selected_modes"] = sorted(df["Modo"].unique())
-
-if "selected_tiempos" not in st.session_state:
-    st.session_state["selected_tiempos"] = sorted(df["Tiempo"].unique())
-
-if "selected_genere" not in st.session_state:
-    st.session_state["selected_genere"] = "Ambos"
-
-if "selected_nombre" not in st.session_state:
-    st.session_state["selected_nombre"] = "Tutti"
-
-if "question" not in st.session_state:
-    new_question()
+# El estado del quiz vive en el motor; session_state solo guarda la sesión
+# y lo propio de la UI (feedback, buffers de tablas, gráfico, widgets)
+if "quiz" not in st.session_state:
+    st.session_state["quiz"] = QuizSession(table, store=get_progress_store())
+    st.session_state["quiz"].load()
+    st.session_state["quiz"].next_question()
+quiz = st.session_state["quiz"]
 
 if "feedback" not in st.session_state:
     st.session_state["feedback"] = ""
 if "validated" not in st.session_state:
     st.session_state["validated"] = False
-if "all_done" not in st.session_state:
-    st.session_state["all_done"] = False
-if "last_questions" not in st.session_state:
-    st.session_state["last_questions"] = []
-if "session_corrects" not in st.session_state:
-    st.session_state["session_corrects"] = []
-if "session_errors" not in st.session_state:
-    st.session_state["session_errors"] = []
-if "repeat_queue" not in st.session_state:
-    st.session_state["repeat_queue"] = []
-if "progress_loaded" not in st.session_state:
-    load_progress()
-    st.session_state["progress_loaded"] = True
+
+# Cambios que quedaron pendientes si el rerun anterior se cortó con st.rerun()
+quiz.flush()
 
 
 # ============================================================
 #                     HERO PRINCIPAL
 # ============================================================
-qs = st.session_state.get("questions", 0)
-sc = st.session_state.get("score", 0)
-pct = (sc / qs * 100) if qs > 0 else 0
-num_repeats = len(st.session_state.get("repeat_queue", []))
+qs = quiz.questions
+pct = quiz.accuracy
+num_repeats = quiz.repeats
 
 st.markdown(
     f"""
@@ -368,47 +189,56 @@ if page == "Allenamento":
     st.sidebar.markdown("## 🎨 Opzioni di Pratica")
 
     st.sidebar.markdown("### 📚 Verbi")
-    st.session_state["selected_verbs"] = st.sidebar.multiselect(
+    quiz.selected_verbs = st.sidebar.multiselect(
         "Scegli verbi:",
-        VERB_COLUMNS.keys(),
-        default=st.session_state["selected_verbs"],
+        VERBS,
+        default=quiz.selected_verbs,
     )
 
     st.sidebar.markdown("### 🎭 Modi")
-    st.session_state["selected_modes"] = st.sidebar.multiselect(
+    quiz.selected_modes = st.sidebar.multiselect(
         "Scegli modo:",
-        sorted(df["Modo"].unique()),
-        default=st.session_state["selected_modes"],
+        MODI,
+        default=quiz.selected_modes,
     )
 
     st.sidebar.markdown("### ⏳ Tempi")
-    st.session_state["selected_tiempos"] = st.sidebar.multiselect(
+    quiz.selected_tiempos = st.sidebar.multiselect(
         "Scegli tempo:",
-        sorted(df["Tiempo"].unique()),
-        default=st.session_state["selected_tiempos"],
+        TEMPI,
+        default=quiz.selected_tiempos,
     )
 
+    # Solo se ofrecen nombres y géneros con preguntas para el resto de los
+    # filtros (precalculado en el índice): ninguna opción lleva a un pool vacío
+    filters = quiz.filters()
+
     st.sidebar.markdown("### 🏷️ Nome del tempo")
-    nombre_options = sorted(df["Nombre"].dropna().unique())
-    nombre_choices = ["Tutti"] + list(nombre_options)
-    current_nombre = st.session_state["selected_nombre"]
+    nombre_choices = ["Tutti", *index.options("Nombre", verbs=quiz.selected_verbs, **filters)]
+    current_nombre = quiz.selected_nombre
     if current_nombre not in nombre_choices:
         current_nombre = "Tutti"
-    st.session_state["selected_nombre"] = st.sidebar.selectbox(
+    quiz.selected_nombre = st.sidebar.selectbox(
         "Scegli nome:",
         nombre_choices,
         index=nombre_choices.index(current_nombre),
     )
 
     st.sidebar.markdown("### 👤 Genere")
-    current_genere = st.session_state["selected_genere"]
-    if current_genere not in ["M", "F", "Ambos"]:
+    filters = quiz.filters()
+    live_generi = index.options("Genere", verbs=quiz.selected_verbs, **filters)
+    genere_choices = [g for g in ["M", "F"] if g in live_generi] + ["Ambos"]
+    current_genere = quiz.selected_genere
+    if current_genere not in genere_choices:
         current_genere = "Ambos"
-    st.session_state["selected_genere"] = st.sidebar.radio(
+    quiz.selected_genere = st.sidebar.radio(
         "Seleziona genere:",
-        ["M", "F", "Ambos"],
-        index=["M", "F", "Ambos"].index(current_genere),
+        genere_choices,
+        index=genere_choices.index(current_genere),
     )
+    dead_generi = [g for g in ["M", "F"] if g not in live_generi]
+    if dead_generi:
+        st.sidebar.caption(f"Nessuna domanda per il genere {', '.join(dead_generi)} con questi filtri.")
 
     st.sidebar.markdown("---")
     if st.sidebar.button("🔄 Rigenera domanda", use_container_width=True):
@@ -429,13 +259,13 @@ if page == "Allenamento":
         unsafe_allow_html=True,
     )
 
-    if st.session_state["question"] is None and not st.session_state["all_done"]:
+    if quiz.question is None and not quiz.all_done:
         new_question()
 
-    q = st.session_state.get("question")
+    q = quiz.question
 
     if q is None:
-        if st.session_state["all_done"]:
+        if quiz.all_done:
             st.markdown(
                 """
                 <div class="mod-card">
@@ -491,7 +321,7 @@ if page == "Allenamento":
         # ---------- FORM: RESPUESTA ----------
         form_key = (
             f"answer_form_{q['tiempo']}_{q['nombre']}_{q['modo']}_"
-            f"{q['pronombre']}_{q['verb']}_{st.session_state['questions']}"
+            f"{q['pronombre']}_{q['verb']}_{quiz.questions}"
         )
 
         with st.form(key=form_key):
@@ -528,98 +358,22 @@ if page == "Allenamento":
                     pass
 
             if submitted and user_input.strip():
-                ans = user_input
-                current_question = st.session_state["question"].copy()
                 st.session_state["validated"] = True
-                st.session_state["questions"] += 1
-
-                if normalize(ans) == normalize(current_question["correct"]):
-                    st.session_state["score"] += 1
+                # El motor corrige, actualiza contadores/tarjeta/historial y guarda
+                is_correct, attempt = quiz.submit(user_input)
+                if is_correct:
                     st.session_state["feedback"] = (
                         f"<div class='feedback-correct'>✅ PERFETTO! "
-                        f"La risposta corretta è: <strong>{current_question['correct']}</strong></div>"
+                        f"La risposta corretta è: <strong>{attempt['correct']}</strong></div>"
                     )
-                    corr = {
-                        "verb": current_question.get("verb"),
-                        "modo": current_question.get("modo"),
-                        "tiempo": current_question.get("tiempo"),
-                        "nombre": current_question.get("nombre"),
-                        "pronombre": current_question.get("pronombre"),
-                        "provided": ans,
-                        "correct": current_question.get("correct"),
-                        "is_repeat": current_question.get("is_repeat", False),
-                    }
-                    st.session_state.setdefault("session_corrects", []).append(corr)
-                    save_progress()
                 else:
                     st.session_state["feedback"] = (
                         f"<div class='feedback-incorrect'>❌ Non proprio. "
-                        f"La forma corretta è: <strong>{current_question['correct']}</strong></div>"
+                        f"La forma corretta è: <strong>{attempt['correct']}</strong></div>"
                     )
-                    err = {
-                        "verb": current_question.get("verb"),
-                        "modo": current_question.get("modo"),
-                        "tiempo": current_question.get("tiempo"),
-                        "nombre": current_question.get("nombre"),
-                        "pronombre": current_question.get("pronombre"),
-                        "provided": ans,
-                        "correct": current_question.get("correct"),
-                        "is_repeat": current_question.get("is_repeat", False),
-                    }
-                    st.session_state.setdefault("session_errors", []).append(err)
-
-                    interval = 3
-                    scheduled_at = st.session_state["questions"] + interval
-                    repeat_item = {
-                        "modo": current_question.get("modo"),
-                        "tiempo": current_question.get("tiempo"),
-                        "nombre": current_question.get("nombre"),
-                        "pronombre": current_question.get("pronombre"),
-                        "verb": current_question.get("verb"),
-                        "correct": current_question.get("correct"),
-                        "genere": current_question.get("genere"),
-                        "scheduled_at": scheduled_at,
-                        "interval": interval,
-                        "attempts": 1,
-                    }
-                    st.session_state.setdefault("repeat_queue", []).append(repeat_item)
-                    save_progress()
-        # Inline script + CSS: forzar que los dos botones del formulario ocupen
-        # el 100% del ancho (cada uno 50%) y no haya espacio entre ellos.
-        # Buscamos el input por placeholder para localizar el form correspondiente.
-        style_script = '''
-        <style>
-        .no-gap-btns { display:flex; gap:0; width:100%; }
-        .no-gap-btns button { flex:1 1 50%; margin:0; }
-        .no-gap-btns button:first-child{ border-top-right-radius:0; border-bottom-right-radius:0; }
-        .no-gap-btns button:last-child{ border-top-left-radius:0; border-bottom-left-radius:0; }
-        </style>
-        <script>
-        (function(){
-            try{
-                const inputs = document.querySelectorAll('input[placeholder="Inserisci la coniugazione corretta..."]');
-                if(!inputs || inputs.length===0) return;
-                const input = inputs[0];
-                const form = input.closest('form');
-                if(!form) return;
-                // localizar contenedor de botones (Streamlit crea divs); agruparlos
-                const buttons = Array.from(form.querySelectorAll('button'))
-                    .filter(b => /(CONTROLLA|PROSSIMA)/i.test(b.innerText || b.textContent));
-                if(buttons.length < 2) return;
-                // crear wrapper
-                const wrapper = document.createElement('div');
-                wrapper.className = 'no-gap-btns';
-                // move buttons into wrapper in correct order
-                // ensure CONTROLLA is first
-                buttons.sort((a,b)=>{ return (/CONTROLLA/i.test(a.innerText||a.textContent)?-1:1) - (/CONTROLLA/i.test(b.innerText||b.textContent)?-1:1); });
-                buttons.forEach(b=>{ wrapper.appendChild(b); });
-                // append wrapper to form
-                form.appendChild(wrapper);
-            }catch(e){console.warn('btn layout script', e)}
-        })();
-        </script>
-        '''
-        st.markdown(style_script, unsafe_allow_html=True)
+        # CSS + script (form_buttons.html): forzar que los dos botones del
+        # formulario ocupen el 100% del ancho (cada uno 50%) sin espacio entre ellos.
+        st.markdown(load_asset("form_buttons.html"), unsafe_allow_html=True)
         if st.session_state["feedback"]:
             st.markdown(st.session_state["feedback"], unsafe_allow_html=True)
 
@@ -651,18 +405,10 @@ if page == "Allenamento":
         st.markdown("<hr style='border-color: rgba(255,255,255,0.08);' />", unsafe_allow_html=True)
         st.markdown("<div class='key'>Storico rapido</div>", unsafe_allow_html=True)
 
-        if st.session_state.get("session_corrects") or st.session_state.get("session_errors"):
+        if quiz.session_corrects or quiz.session_errors:
             if st.button("🧹 RICOMINCIA SESSIONE", use_container_width=True):
-                st.session_state["score"] = 0
-                st.session_state["questions"] = 0
-                st.session_state["session_corrects"] = []
-                st.session_state["session_errors"] = []
-                st.session_state["repeat_queue"] = []
-                st.session_state["last_questions"] = []
-                st.session_state["feedback"] = ""
-                st.session_state["validated"] = False
-                st.session_state["all_done"] = False
-                save_progress()
+                quiz.reset()
+                quiz.save()
                 new_question()
                 try:
                     st.rerun()
@@ -672,22 +418,9 @@ if page == "Allenamento":
             rc, re = st.columns(2)
             with rc:
                 st.markdown("<strong>Corrette (sessione)</strong>", unsafe_allow_html=True)
-                sc_sess = st.session_state.get("session_corrects", [])
+                sc_sess = quiz.session_corrects
                 if sc_sess:
-                    df_sc = pd.DataFrame(sc_sess)
-                    df_display = df_sc[
-                        ["verb", "modo", "tiempo", "nombre", "pronombre", "provided", "correct"]
-                    ].rename(
-                        columns={
-                            "verb": "Verbo",
-                            "modo": "Modo",
-                            "tiempo": "Tempo",
-                            "nombre": "Serie",
-                            "pronombre": "Pronome",
-                            "provided": "Risposta data",
-                            "correct": "Corretta",
-                        }
-                    )
+                    df_display = history_frame("session_corrects", QUICK_COLUMNS, last=HISTORY_WINDOW)
                     st.dataframe(df_display, use_container_width=True, hide_index=True)
                 else:
                     st.markdown(
@@ -696,22 +429,9 @@ if page == "Allenamento":
                     )
             with re:
                 st.markdown("<strong>Errori (sessione)</strong>", unsafe_allow_html=True)
-                se_sess = st.session_state.get("session_errors", [])
+                se_sess = quiz.session_errors
                 if se_sess:
-                    df_se = pd.DataFrame(se_sess)
-                    df_display = df_se[
-                        ["verb", "modo", "tiempo", "nombre", "pronombre", "provided", "correct"]
-                    ].rename(
-                        columns={
-                            "verb": "Verbo",
-                            "modo": "Modo",
-                            "tiempo": "Tempo",
-                            "nombre": "Serie",
-                            "pronombre": "Pronome",
-                            "provided": "Risposta data",
-                            "correct": "Corretta",
-                        }
-                    )
+                    df_display = history_frame("session_errors", QUICK_COLUMNS, last=HISTORY_WINDOW)
                     st.dataframe(df_display, use_container_width=True, hide_index=True)
                 else:
                     st.markdown(
@@ -739,26 +459,15 @@ elif page == "Ripasso":
         unsafe_allow_html=True,
     )
 
+    window_label = st.selectbox("Righe da mostrare", list(HISTORY_WINDOWS), index=1)
+    window = HISTORY_WINDOWS[window_label]
+
     tab1, tab2 = st.tabs(["✅ Corrette", "❌ Errori"])
 
     with tab1:
-        sc_sess = st.session_state.get("session_corrects", [])
+        sc_sess = quiz.session_corrects
         if sc_sess:
-            df_sc = pd.DataFrame(sc_sess)
-            df_display = df_sc[
-                ["verb", "modo", "tiempo", "nombre", "pronombre", "provided", "correct", "is_repeat"]
-            ].rename(
-                columns={
-                    "verb": "Verbo",
-                    "modo": "Modo",
-                    "tiempo": "Tempo",
-                    "nombre": "Serie",
-                    "pronombre": "Pronome",
-                    "provided": "Risposta data",
-                    "correct": "Corretta",
-                    "is_repeat": "Ripetizione",
-                }
-            )
+            df_display = history_frame("session_corrects", ATTEMPT_FIELDS, last=window)
             st.dataframe(df_display, use_container_width=True, hide_index=True)
         else:
             st.markdown(
@@ -767,23 +476,9 @@ elif page == "Ripasso":
             )
 
     with tab2:
-        se_sess = st.session_state.get("session_errors", [])
+        se_sess = quiz.session_errors
         if se_sess:
-            df_se = pd.DataFrame(se_sess)
-            df_display = df_se[
-                ["verb", "modo", "tiempo", "nombre", "pronombre", "provided", "correct", "is_repeat"]
-            ].rename(
-                columns={
-                    "verb": "Verbo",
-                    "modo": "Modo",
-                    "tiempo": "Tempo",
-                    "nombre": "Serie",
-                    "pronombre": "Pronome",
-                    "provided": "Risposta data",
-                    "correct": "Corretta",
-                    "is_repeat": "Ripetizione",
-                }
-            )
+            df_display = history_frame("session_errors", ATTEMPT_FIELDS, last=window)
             st.dataframe(df_display, use_container_width=True, hide_index=True)
         else:
             st.markdown(
@@ -807,47 +502,47 @@ elif page == "Ripasso":
     col_f1, col_f2, col_f3, col_f4 = st.columns(4)
 
     with col_f1:
-        verb_list = list(VERB_COLUMNS.keys())
+        verb_list = VERBS
         selected_verb_tbl = st.selectbox("Verbo", verb_list, index=0)
 
     with col_f2:
-        modos_list = sorted(df["Modo"].unique())
-        selected_modos_tbl = st.multiselect("Modo", modos_list, default=modos_list)
+        selected_modos_tbl = st.multiselect("Modo", MODI, default=MODI)
 
     with col_f3:
-        tiempos_list = sorted(df["Tiempo"].unique())
-        selected_tiempos_tbl = st.multiselect("Tempo", tiempos_list, default=tiempos_list)
+        selected_tiempos_tbl = st.multiselect("Tempo", TEMPI, default=TEMPI)
 
     with col_f4:
-        pron_available = [p for p in PRON_ORDER if p in df["Pronombre"].unique()]
-        selected_pron_tbl = st.multiselect("Pronome", pron_available, default=pron_available)
-
-    genere_filter_tbl = st.radio("Genere", ["Ambos", "M", "F"], horizontal=True, index=0)
-
-    df_v = df.copy()
-    col_verb = VERB_COLUMNS[selected_verb_tbl]
-
-    if selected_modos_tbl:
-        df_v = df_v[df_v["Modo"].isin(selected_modos_tbl)]
-    if selected_tiempos_tbl:
-        df_v = df_v[df_v["Tiempo"].isin(selected_tiempos_tbl)]
-    if selected_pron_tbl:
-        df_v = df_v[df_v["Pronombre"].isin(selected_pron_tbl)]
-    if genere_filter_tbl != "Ambos":
-        df_v = df_v[df_v["Genere"] == genere_filter_tbl]
+        selected_pron_tbl = st.multiselect("Pronome", PRONOMI, default=PRONOMI)
+
+    col_g, col_l = st.columns(2)
+    with col_g:
+        genere_filter_tbl = st.radio("Genere", ["Ambos", *index.options("Genere")], horizontal=True, index=0)
+    with col_l:
+        layout_tbl = st.radio("Vista", ["Tabella", "Paradigma"], horizontal=True, index=0)
+
+    # Vista filtrada compartida entre sesiones (LRU del índice por firma de filtros);
+    # las filas ya vienen ordenadas por modo, tempo, serie e pronome
+    tbl_filters = dict(
+        modes=selected_modos_tbl,
+        tiempos=selected_tiempos_tbl,
+        genere=genere_filter_tbl if genere_filter_tbl != "Ambos" else None,
+        pronouns=selected_pron_tbl,
+    )
+    df_v = index.view(selected_verb_tbl, **tbl_filters)
 
     if df_v.empty:
         st.info("Nessuna combinazione trovata con i filtri selezionati.")
+    elif layout_tbl == "Paradigma":
+        st.dataframe(index.paradigm(selected_verb_tbl, **tbl_filters), use_container_width=True)
     else:
-        df_v = df_v.sort_values(["Modo", "Tiempo", "Nombre", "Pronombre"])
-        df_show = df_v[["Modo", "Tiempo", "Nombre", "Pronombre", "Genere", col_verb]].rename(
+        df_show = df_v[["Modo", "Tiempo", "Nombre", "Pronombre", "Genere", "Forma"]].rename(
             columns={
                 "Modo": "Modo",
                 "Tiempo": "Tempo",
                 "Nombre": "Serie",
                 "Pronombre": "Pronome",
                 "Genere": "Genere",
-                col_verb: "Coniugazione",
+                "Forma": "Coniugazione",
             }
         )
         st.dataframe(df_show, use_container_width=True, hide_index=True)
@@ -855,31 +550,52 @@ elif page == "Ripasso":
 # ============================================================
 #              DASHBOARD: RENDIMENTO ULTIMA SESSIONE
 # ============================================================
+@TRACER.timed("dashboard.chart")
+def build_performance_chart(perf: pd.DataFrame):
+    """Gráfico de precisión por 'Nome del tempo' (barras + porcentaje)."""
+    # altair solo se importa cuando hay datos para graficar
+    import altair as alt
+
+    base = alt.Chart(perf).encode(
+        y=alt.Y("Nome:N", sort=alt.EncodingSortField(field="accuracy", op="min", order="ascending"), title=None),
+    )
+
+    # barras más delgadas (size) para un aspecto menos 'gordo'
+    bars = base.mark_bar(size=18).encode(
+        x=alt.X("accuracy:Q", title="Precisione (%)", scale=alt.Scale(domain=[0, 100])),
+        color=alt.condition(alt.datum.accuracy < 60, alt.value("#d62728"), alt.value("#2ca02c")),
+        tooltip=[alt.Tooltip("Nome:N"), alt.Tooltip("corrects:Q", title="Corrette"), alt.Tooltip("errors:Q", title="Errori"), alt.Tooltip("accuracy:Q", format=".1f", title="Precisione (%)")],
+    )
+
+    # Mostrar el porcentaje dentro de la barra (alineado a la derecha, con color blanco y mayor tamaño)
+    text = base.mark_text(align='right', dx=-6, color='white', fontSize=18, fontWeight='bold').encode(
+        x=alt.X('accuracy:Q'),
+        text=alt.Text('accuracy:Q', format='.1f')
+    )
+
+    # Hacer el gráfico más alto para mejorar visibilidad: al menos 420px
+    # y usar menos alto por fila para barras más estrechas (36px por fila)
+    chart_height = max(420, 36 * len(perf))
+    return (bars + text).properties(height=chart_height, width='container')
+
+
 st.markdown("---")
 st.markdown("## 📊 Rendimento ultima sessione per 'Nome del tempo'")
-sc = st.session_state.get("session_corrects", [])
-se = st.session_state.get("session_errors", [])
-if not sc and not se:
+stats = quiz.performance
+if not stats:
     st.info("Nessuna attività registrata in questa sessione. Rispondi ad alcune domande per vedere il rendimento qui.")
 else:
-    # Construir DataFrame de intentos por 'nombre'
-    df_corr = pd.DataFrame(sc) if sc else pd.DataFrame(columns=["nombre"])
-    df_err = pd.DataFrame(se) if se else pd.DataFrame(columns=["nombre"])
-
-    # Normalizar columna nombre
-    if "nombre" in df_corr.columns:
-        df_corr["nombre"] = df_corr["nombre"].astype(str)
-    if "nombre" in df_err.columns:
-        df_err["nombre"] = df_err["nombre"].astype(str)
-
-    corr_counts = df_corr.groupby("nombre").size().rename("corrects") if not df_corr.empty else pd.Series(dtype=int)
-    err_counts = df_err.groupby("nombre").size().rename("errors") if not df_err.empty else pd.Series(dtype=int)
-
-    perf = pd.concat([corr_counts, err_counts], axis=1).fillna(0)
-    perf["attempts"] = perf["corrects"] + perf["errors"]
-    perf = perf[perf["attempts"] > 0]
-    perf["accuracy"] = (perf["corrects"] / perf["attempts"]) * 100
-    perf = perf.reset_index().rename(columns={"nombre": "Nome"})
+    # Drill-down: se filtra sobre los contadores por celda, sin recorrer el historial
+    drill_cols = st.columns(2)
+    with drill_cols[0]:
+        drill_verb = st.selectbox("Verbo", ["Tutti"] + stats.options("verb"), key="drill_verb")
+    with drill_cols[1]:
+        drill_pron = st.selectbox("Pronome", ["Tutti"] + stats.options("pronombre"), key="drill_pron")
+    drill_verb = None if drill_verb == "Tutti" else drill_verb
+    drill_pron = None if drill_pron == "Tutti" else drill_pron
+
+    with TRACER.span("dashboard.stats"):
+        perf = stats.frame("nombre", verb=drill_verb, pronombre=drill_pron).rename(columns={"nombre": "Nome"})
 
     if perf.empty:
         st.info("Non ci sono tentativi per alcun 'Nome' in questa sessione.")
@@ -887,31 +603,17 @@ else:
         # Ordenar por accuracy ascendente para resaltar los tiempos con peor rendimiento arriba
         perf = perf.sort_values(by="accuracy", ascending=True)
 
+        # El gráfico solo se reconstruye cuando cambian los contadores o el filtro
+        chart_key = (stats.version, drill_verb, drill_pron)
+        cached_chart = st.session_state.get("performance_chart")
+        if cached_chart and cached_chart[0] == chart_key:
+            chart = cached_chart[1]
+        else:
+            chart = build_performance_chart(perf)
+            st.session_state["performance_chart"] = (chart_key, chart)
 
-
-        base = alt.Chart(perf).encode(
-            y=alt.Y("Nome:N", sort=alt.EncodingSortField(field="accuracy", op="min", order="ascending"), title=None),
-        )
-
-        # barras más delgadas (size) para un aspecto menos 'gordo'
-        bars = base.mark_bar(size=18).encode(
-            x=alt.X("accuracy:Q", title="Precisione (%)", scale=alt.Scale(domain=[0, 100])),
-            color=alt.condition(alt.datum.accuracy < 60, alt.value("#d62728"), alt.value("#2ca02c")),
-            tooltip=[alt.Tooltip("Nome:N"), alt.Tooltip("corrects:Q", title="Corrette"), alt.Tooltip("errors:Q", title="Errori"), alt.Tooltip("accuracy:Q", format=".1f", title="Precisione (%)")],
-        )
-
-        # Mostrar el porcentaje dentro de la barra (alineado a la derecha, con color blanco y mayor tamaño)
-        text = base.mark_text(align='right', dx=-6, color='white', fontSize=18, fontWeight='bold').encode(
-            x=alt.X('accuracy:Q'),
-            text=alt.Text('accuracy:Q', format='.1f')
-        )
-
-        # Hacer el gráfico más alto para mejorar visibilidad: al menos 420px
-        # y usar menos alto por fila para barras más estrechas (36px por fila)
-        chart_height = max(420, 36 * len(perf))
-        chart = (bars + text).properties(height=chart_height, width='container')
-
-        st.altair_chart(chart, use_container_width=True)
+        with TRACER.span("dashboard.render"):
+            st.altair_chart(chart, use_container_width=True)
 
         # Tabla resumen compacta
         perf_display = perf[["Nome", "corrects", "errors", "attempts", "accuracy"]].rename(columns={
@@ -923,3 +625,34 @@ else:
         st.dataframe(perf_display.style.format({"Precisione (%)": "{:.1f}"}), use_container_width=True)
 
         st.markdown("</div>", unsafe_allow_html=True)
+
+# Escribir en un solo lote los cambios de progreso de este rerun
+with TRACER.span("flush_progress"):
+    quiz.flush()
+
+# ============================================================
+#                 PANEL DE DEBUG: TEMPI
+# ============================================================
+rerun_timing = TRACER.end_rerun()
+st.sidebar.markdown("---")
+if st.sidebar.checkbox("🛠️ Debug tempi", key="debug_panel"):
+    with st.sidebar.expander("⏱️ Tempi di esecuzione", expanded=True):
+        if rerun_timing:
+            st.caption(f"Questo rerun: {rerun_timing['total_s'] * 1000:.1f} ms")
+            spans = pd.DataFrame(
+                sorted(rerun_timing["spans"].items(), key=lambda kv: -kv[1]), columns=["Span", "ms"]
+            )
+            spans["ms"] *= 1000
+            st.dataframe(spans.style.format({"ms": "{:.2f}"}), hide_index=True, use_container_width=True)
+        summary = TRACER.summary()
+        if summary:
+            st.caption("Percentili mobili (tutte le sessioni)")
+            st.dataframe(
+                pd.DataFrame(summary).style.format({"p50_ms": "{:.2f}", "p90_ms": "{:.2f}", "p99_ms": "{:.2f}"}),
+                hide_index=True,
+                use_container_width=True,
+            )
+        st.download_button("⬇️ JSONL", TRACER.to_jsonl(), file_name="tempi.jsonl", use_container_width=True)
+        st.download_button(
+            "⬇️ Prometheus", TRACER.to_prometheus(), file_name="tempi.prom", use_container_width=True
+        )
@@ -0,0 +1,30 @@
+"""Escritura atómica de archivos (temporal único + ``os.replace``).
+
+Cada escritor obtiene su propio temporal con ``mkstemp`` en el mismo
+directorio que el destino, así dos procesos que escriben el mismo archivo no
+se pisan y un corte a mitad nunca deja el destino a medias.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", fsync: bool = False, permissions: int = 0o644, **open_kwargs):
+    """
+    Abre un temporal para escribir y al salir lo renombra sobre ``path``; si
+    hay una excepción lo borra y ``path`` queda como estaba. ``open_kwargs``
+    va a ``open`` (``encoding``, ``newline``...).
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **open_kwargs) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(tmp, permissions)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -0,0 +1,338 @@
+"""Benchmark headless de los caminos calientes del quiz (sin la UI de Streamlit).
+
+Ejecuta el mismo motor que usa ``app.py`` (``quiz_engine.QuizSession``) sobre
+datasets sintéticos:
+
+- ``load_data``: ``load_conjugations`` desde CSV (frío) y desde el bundle en caché (mmap).
+- ``new_question``: tarjeta vencida + prefetch del índice de preguntas.
+- ``normalize``: corrección de una respuesta con ``grade_answer``.
+- ``save_progress``: guardado de un intento con el store journal y sqlite.
+- ``dashboard``: contadores de rendimiento y tablas del historial.
+- ``history``: memoria del historial como dicts vs ``AttemptLog`` compacto.
+
+Los verbos escalan de 5 a 10k y el historial de 0 a 1M intentos; cada caso
+reporta percentiles de latencia y memoria pico (tracemalloc) en JSON.
+
+    python bench_engine.py --verbs 5,500,10000 --history 0,10000,1000000 -o bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from conjugation_data import KEY_COLUMNS, load_conjugations
+from grading import grade_answer
+from history import ATTEMPT_FIELDS, DISPLAY_NAMES, AttemptLog, PerformanceStats
+from progress_store import make_progress_store
+from quiz_engine import ConjugationTable, QuizSession
+from quiz_index import QuestionIndex
+
+BASE_DATA = "conjugazioni.csv"
+
+
+# ============================================================
+#                     MEDICIÓN
+# ============================================================
+def _percentiles(samples: list) -> dict:
+    arr = np.asarray(samples) * 1000
+    return {
+        "n": len(samples),
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "max_ms": float(arr.max()),
+    }
+
+
+def measure(name: str, params: dict, fn, repeat: int) -> dict:
+    """Latencias de ``repeat`` llamadas a ``fn`` + memoria pico de una llamada extra."""
+    gc.collect()
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {"name": name, "params": params, **_percentiles(samples), "peak_kb": peak / 1024}
+    print(f"{name:<22} {json.dumps(params):<40} p50={result['p50_ms']:.3f}ms p95={result['p95_ms']:.3f}ms", file=sys.stderr)
+    return result
+
+
+# ============================================================
+#                     DATOS SINTÉTICOS
+# ============================================================
+def synthetic_long(n_verbs: int, base: pd.DataFrame) -> pd.DataFrame:
+    """Tabla larga con ``n_verbs`` verbos falsos sobre las combinaciones reales."""
+    keys = base[KEY_COLUMNS].drop_duplicates().astype(str).reset_index(drop=True)
+    verbs = np.asarray([f"verbo{i}" for i in range(n_verbs)])
+    long = keys.loc[np.tile(np.arange(len(keys)), n_verbs)].reset_index(drop=True)
+    long.insert(0, "Verbo", np.repeat(verbs, len(keys)))
+    long["Forma"] = long["Verbo"].str.cat(long.index.astype(str), sep="_")
+    return long
+
+
+def synthetic_attempts(index: QuestionIndex, n: int, rng: random.Random) -> list:
+    """``n`` intentos con la forma de ``session_corrects``/``session_errors``."""
+    attempts = []
+    for _ in range(n):
+        row_id = rng.randrange(index.size)
+        verb = index.verbs[rng.randrange(len(index.verbs))]
+        r = index.record(row_id)
+        correct = index.form(row_id, verb)
+        attempts.append(
+            {
+                "verb": verb,
+                "modo": r["Modo"],
+                "tiempo": r["Tiempo"],
+                "nombre": r["Nombre"],
+                "pronombre": r["Pronombre"],
+                "provided": correct if rng.random() < 0.7 else "x",
+                "correct": correct,
+                "is_repeat": False,
+            }
+        )
+    return attempts
+
+
+def make_session(table: ConjugationTable, attempts: list, rng: random.Random) -> QuizSession:
+    """``QuizSession`` con ``attempts`` ya respondidos (sin store: no guarda)."""
+    session = QuizSession(table, rng=rng)
+    session.score = sum(a["provided"] == a["correct"] for a in attempts)
+    session.questions = len(attempts)
+    session.session_corrects = AttemptLog.from_json([a for a in attempts if a["provided"] == a["correct"]], table.pools)
+    session.session_errors = AttemptLog.from_json([a for a in attempts if a["provided"] != a["correct"]], table.pools)
+    return session
+
+
+# ============================================================
+#              REFERENCIA: HISTORIAL COMO DICTS
+# ============================================================
+# Línea base de ``history.dicts``: el buffer de la app antes de ``AttemptLog``
+# (columnas de objetos preasignadas, copiadas desde la lista de dicts).
+class HistoryBuffer:
+    """Columnas preasignadas + caché de DataFrames por versión."""
+
+    def __init__(self, capacity: int = 256):
+        self._capacity = capacity
+        self._cols = {f: np.empty(capacity, dtype=object) for f in ATTEMPT_FIELDS}
+        self._n = 0
+        self._source = None
+        self.version = 0
+        self._frames: dict = {}
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity != self._capacity:
+            for f, col in self._cols.items():
+                bigger = np.empty(capacity, dtype=object)
+                bigger[: self._n] = col[: self._n]
+                self._cols[f] = bigger
+            self._capacity = capacity
+
+    def clear(self) -> None:
+        self._n = 0
+        self.version += 1
+        self._frames.clear()
+
+    def extend(self, items) -> None:
+        """Agrega intentos (dicts con las claves de ``ATTEMPT_FIELDS``)."""
+        items = list(items)
+        if not items:
+            return
+        self._grow(self._n + len(items))
+        end = self._n + len(items)
+        for f, col in self._cols.items():
+            col[self._n : end] = [it.get(f) for it in items]
+        self._n = end
+        self.version += 1
+        self._frames.clear()
+
+    def sync(self, items: list) -> "HistoryBuffer":
+        """Se pone al día con la lista de la sesión copiando solo lo nuevo."""
+        if items is not self._source or len(items) < self._n:
+            self._source = items
+            self.clear()
+        if len(items) > self._n:
+            self.extend(items[self._n :])
+        return self
+
+    def frame(self, columns: list, last: int = None) -> pd.DataFrame:
+        """
+        DataFrame con ``columns`` renombradas para mostrar; con ``last`` solo
+        las últimas filas. Se reutiliza mientras no cambie la versión.
+        """
+        key = (tuple(columns), last)
+        cached = self._frames.get(key)
+        if cached is not None:
+            return cached
+        start = 0 if last is None else max(0, self._n - last)
+        df = pd.DataFrame(
+            {DISPLAY_NAMES[c]: self._cols[c][start : self._n] for c in columns},
+            index=pd.RangeIndex(start, self._n),
+        )
+        self._frames[key] = df
+        return df
+
+
+# ============================================================
+#                     CAMINOS CALIENTES
+# ============================================================
+def answer(session: QuizSession, rng: random.Random) -> None:
+    """Responder una pregunta: corrección, contadores, tarjeta e historial."""
+    question = session.next_question()
+    session.submit(question["correct"].upper() if rng.random() < 0.7 else "x")
+
+
+# ============================================================
+#                     ESCENARIOS
+# ============================================================
+def bench_load(n_verbs: int, base: pd.DataFrame, tmp: str, repeat: int) -> list:
+    path = os.path.join(tmp, f"verbs{n_verbs}.csv")
+    synthetic_long(n_verbs, base).to_csv(path, index=False)
+    cache = os.path.join(tmp, ".cache")
+
+    def cold():
+        shutil.rmtree(cache, ignore_errors=True)
+        load_conjugations(path)
+
+    params = {"verbs": n_verbs}
+    return [
+        measure("load_data.csv", params, cold, max(1, repeat // 10)),
+        measure("load_data.bundle", params, lambda: load_conjugations(path), repeat),
+    ]
+
+
+def bench_engine(n_verbs: int, histories: list, base: pd.DataFrame, repeat: int, seed: int) -> list:
+    rng = random.Random(seed)
+    long = synthetic_long(n_verbs, base)
+    table = ConjugationTable(long)
+    index, checker = table.index, table.checker
+    results = [
+        measure("build_index", {"verbs": n_verbs}, lambda: QuestionIndex(long), max(1, repeat // 10)),
+        measure("build_table", {"verbs": n_verbs}, lambda: ConjugationTable(long), max(1, repeat // 10)),
+    ]
+
+    for n_hist in histories:
+        params = {"verbs": n_verbs, "history": n_hist}
+        slow_repeat = max(1, repeat // 10) if n_hist <= 100_000 else 2
+        attempts = synthetic_attempts(index, n_hist, rng)
+        session = make_session(table, attempts, rng)
+        results.append(measure("new_question", params, session.next_question, repeat))
+        results.append(measure("answer", params, lambda: answer(session, rng), repeat))
+        words = [a["provided"] for a in attempts[:1000]] or ["sono"]
+        results.append(
+            measure("normalize", params, lambda: grade_answer({"correct": rng.choice(words)}, rng.choice(words), checker), repeat)
+        )
+
+        # Dashboard: contadores incrementales vs reconstrucción desde el historial
+        stats = PerformanceStats.from_history(session.session_corrects, session.session_errors)
+        results.append(
+            measure("dashboard.frame", params, lambda: (stats.record(attempts[0] if attempts else {}, True), stats.frame()), repeat)
+        )
+        results.append(
+            measure(
+                "dashboard.rebuild",
+                params,
+                lambda: PerformanceStats.from_history(session.session_corrects, session.session_errors).frame(),
+                slow_repeat,
+            )
+        )
+        results.append(
+            measure(
+                "history.table",
+                params,
+                lambda: (session.session_errors.append(attempts[0] if attempts else {}), session.session_errors.frame(["verb", "nombre", "provided"], last=50)),
+                repeat,
+            )
+        )
+        # Memoria del historial: lista de dicts + buffer columnar vs AttemptLog (peak_kb)
+        results.append(
+            measure("history.dicts", params, lambda: HistoryBuffer().sync([dict(a) for a in attempts]), slow_repeat)
+        )
+        results.append(
+            measure("history.log", params, lambda: AttemptLog.from_json(attempts, table.pools), slow_repeat)
+        )
+
+        for kind in ("journal", "sqlite"):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "progress.json" if kind == "journal" else "progress.db")
+                store = make_progress_store(kind, path=path, user="bench")
+                # Sesión ya cargada: el historial existente es la línea base del store
+                store.load()
+                store._remember(session.to_state())
+                session.store = store
+
+                def save():
+                    answer(session, rng)  # submit() guarda
+                    session.flush()
+
+                results.append(measure(f"save_progress.{kind}", params, save, repeat))
+                session.store = None
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark headless del motor del quiz.")
+    parser.add_argument("--verbs", default="5,50,500,10000", help="cantidades de verbos (coma)")
+    parser.add_argument("--history", default="0,1000,100000,1000000", help="tamaños de historial (coma)")
+    parser.add_argument("--repeat", type=int, default=200, help="llamadas medidas por caso")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data", default=BASE_DATA, help="dataset real de donde salen las combinaciones")
+    parser.add_argument("-o", "--output", help="archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    verbs = [int(v) for v in args.verbs.split(",")]
+    histories = [int(h) for h in args.history.split(",")]
+    base = load_conjugations(args.data)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_verbs in verbs:
+            results.extend(bench_load(n_verbs, base, tmp, args.repeat))
+    for n_verbs in verbs:
+        results.extend(bench_engine(n_verbs, histories, base, args.repeat, args.seed))
+
+    # Curvas de escalado: p50 de cada caso en función de sus parámetros
+    curves: dict = {}
+    for r in results:
+        curves.setdefault(r["name"], []).append({**r["params"], "p50_ms": r["p50_ms"], "peak_kb": r["peak_kb"]})
+
+    report = {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "repeat": args.repeat,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+        "curves": curves,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
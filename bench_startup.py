@@ -0,0 +1,108 @@
+"""Benchmark de arranque de la app: cold start y reruns en caliente.
+
+Cada arranque en frío es un proceso nuevo que ejecuta ``app.py`` con el
+``AppTest`` de Streamlit (imports + carga del dataset + índice); dentro del
+mismo proceso se miden después varios reruns en caliente, que es lo que paga
+cada interacción del alumno. El resultado sale en JSON.
+
+    python bench_startup.py --cold 5 --warm 20 --clear-cache -o startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from conjugation_data import cache_path
+
+_CHILD = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_import = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+at.run()
+t_first = time.perf_counter()
+if at.exception:
+    sys.exit(f"app.py falló: {at.exception}")
+warm = []
+for _ in range(int(sys.argv[2])):
+    t = time.perf_counter()
+    at.run()
+    warm.append(time.perf_counter() - t)
+print(json.dumps({
+    "streamlit_import_s": t_import - t0,
+    "first_run_s": t_first - t_import,
+    "warm_rerun_s": warm,
+}))
+"""
+
+
+def _summary(values: list) -> dict:
+    values = sorted(values)
+    return {
+        "min": values[0],
+        "median": statistics.median(values),
+        "p95": values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))],
+        "max": values[-1],
+    }
+
+
+def run_cold(app: str, warm: int, clear_cache: bool, data: str) -> dict:
+    """Un arranque en frío en un proceso nuevo; devuelve sus tiempos."""
+    if clear_cache and os.path.exists(cache_path(data)):
+        os.remove(cache_path(data))
+    with tempfile.TemporaryDirectory() as tmp:
+        # El progreso del benchmark no toca el del repo
+        env = dict(os.environ, PROGRESS_PATH=os.path.join(tmp, "progress.json"))
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", _CHILD, os.path.abspath(app), str(warm)],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=os.path.dirname(os.path.abspath(app)),
+        )
+        wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "error")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["cold_wall_s"] = wall
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mide cold start y reruns de app.py.")
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--data", default="conjugazioni.csv", help="dataset (para --clear-cache)")
+    parser.add_argument("--cold", type=int, default=3, help="arranques en frío (procesos)")
+    parser.add_argument("--warm", type=int, default=10, help="reruns en caliente por proceso")
+    parser.add_argument("--clear-cache", action="store_true", help="borra la caché .bundle antes de cada arranque")
+    parser.add_argument("-o", "--output", help="archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    runs = [run_cold(args.app, args.warm, args.clear_cache, args.data) for _ in range(args.cold)]
+    report = {
+        "python": sys.version.split()[0],
+        "cold_runs": args.cold,
+        "warm_reruns": args.warm,
+        "clear_cache": args.clear_cache,
+        "cold_wall_s": _summary([r["cold_wall_s"] for r in runs]),
+        "first_run_s": _summary([r["first_run_s"] for r in runs]),
+        "streamlit_import_s": _summary([r["streamlit_import_s"] for r in runs]),
+        "warm_rerun_s": _summary([t for r in runs for t in r["warm_rerun_s"]]),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
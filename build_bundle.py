@@ -0,0 +1,53 @@
+"""Compila uno o varios CSV de conjugaciones en un bundle binario (``.bundle``).
+
+El bundle es el mismo formato que la app guarda en ``.cache/``: strings en un
+pool, códigos int32 por columna y formas ya normalizadas, listo para abrirse
+con ``mmap`` sin parsear nada. Si dos archivos traen la misma forma (verbo +
+modo + tiempo + nombre + pronombre + género), gana el último.
+
+    python build_bundle.py conjugazioni.csv otros_verbos.csv -o conjugazioni.bundle
+
+La app lo usa pasándolo como dataset (``CONJUGATIONS_PATH=conjugazioni.bundle``
+o ``--data conjugazioni.bundle`` en ``quiz_api.py``).
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from conjugation_data import KEY_COLUMNS, open_bundle, to_long, write_bundle
+
+
+def build(paths: list, output: str) -> pd.DataFrame:
+    """Une los CSV en formato largo, sin claves repetidas, y escribe el bundle."""
+    long = pd.concat([to_long(pd.read_csv(p)) for p in paths], ignore_index=True)
+    long = long.drop_duplicates(subset=["Verbo"] + KEY_COLUMNS, keep="last").reset_index(drop=True)
+    write_bundle(long, output)
+    return long
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compila CSV de conjugaciones en un bundle binario.")
+    parser.add_argument("inputs", nargs="+", help="CSV anchos o largos")
+    parser.add_argument("-o", "--output", default="conjugazioni.bundle")
+    args = parser.parse_args(argv)
+
+    t = time.perf_counter()
+    long = build(args.inputs, args.output)
+    built = time.perf_counter() - t
+    t = time.perf_counter()
+    open_bundle(args.output)
+    opened = time.perf_counter() - t
+    print(
+        f"{args.output}: {len(long)} formas, {long['Verbo'].nunique()} verbos, "
+        f"{os.path.getsize(args.output) / 1024:.0f} KiB "
+        f"(compilado en {built:.2f}s, abierto en {opened * 1000:.1f}ms)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""Modelo de repetición espaciada por tarjeta (estilo SM-2 con estabilidad).
+
+Una tarjeta es un par (fila del ``QuestionIndex``, verbo): su id es
+``fila * n_verbos + posición_del_verbo``, el mismo orden que ``index.forms``.
+Solo las tarjetas ya vistas tienen estado: arrays de NumPy que crecen al doble
+(id, facilidad, intervalo, vencimiento, estabilidad, repeticiones, fallos),
+así una sesión nueva no reserva nada por filas × verbos y elegir la próxima
+tarjeta vencida y puntuar su prioridad sigue siendo vectorizado sobre las
+vistas.
+
+El reloj es el contador de preguntas de la sesión (como ``scheduled_at`` en la
+cola de repetición anterior): los intervalos se miden en preguntas.
+"""
+import numpy as np
+
+# Orden de los campos en la serialización compacta (progress.json / journal)
+CARD_FIELDS = [
+    "modo",
+    "tiempo",
+    "nombre",
+    "pronombre",
+    "genere",
+    "verb",
+    "ease",
+    "interval",
+    "due",
+    "last",
+    "stability",
+    "reps",
+    "lapses",
+]
+CARD_KEY_FIELDS = CARD_FIELDS[:6]
+# Arrays por tarjeta vista (indexados por posición, no por id)
+ARRAY_FIELDS = ["ids", "ease", "interval", "stability", "due", "last", "reps", "lapses"]
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+LAPSE_INTERVAL = 3  # preguntas hasta repetir una respuesta equivocada
+FIRST_INTERVAL = 8  # preguntas hasta revisar una tarjeta acertada por primera vez
+TARGET_RECALL = 0.9  # recuerdo esperado cuando pasa ``stability`` preguntas
+
+
+def card_key(item) -> tuple:
+    """Clave (modo, tiempo, nombre, pronombre, genere, verbo) de un registro."""
+    if isinstance(item, dict):
+        return tuple(item.get(f) for f in CARD_KEY_FIELDS)
+    return tuple(item[: len(CARD_KEY_FIELDS)])
+
+
+class CardModel:
+    """
+    Estado SM-2 de las tarjetas ya vistas en arrays de NumPy que crecen al
+    doble (una posición por tarjeta, ``_slots`` traduce id -> posición).
+    """
+
+    def __init__(self, index, capacity: int = 16):
+        self.index = index
+        self.n_verbs = len(index.verbs)
+        self._verb_pos = index.verb_pos  # compartido, no se copia por sesión
+        self._slots: dict = {}
+        self._n = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.ease = np.empty(capacity, dtype=np.float32)
+        self.interval = np.empty(capacity, dtype=np.float32)
+        self.stability = np.empty(capacity, dtype=np.float32)
+        self.due = np.empty(capacity)  # inf = tarjeta sin agendar
+        self.last = np.empty(capacity)
+        self.reps = np.empty(capacity, dtype=np.int32)
+        self.lapses = np.empty(capacity, dtype=np.int32)
+        # Tarjetas modificadas desde el último drain_changes() (para el journal)
+        self._changes: dict = {}
+
+    def __len__(self) -> int:
+        return int(np.isfinite(self.due[: self._n]).sum())
+
+    def __bool__(self) -> bool:
+        return bool(np.isfinite(self.due[: self._n]).any())
+
+    def _slot(self, card: int) -> int:
+        """Posición de ``card`` en los arrays (la crea con el estado inicial)."""
+        slot = self._slots.get(card)
+        if slot is not None:
+            return slot
+        slot = self._n
+        if slot == len(self.ids):
+            for name in ARRAY_FIELDS:
+                col = getattr(self, name)
+                bigger = np.empty(2 * len(col), dtype=col.dtype)
+                bigger[:slot] = col[:slot]
+                setattr(self, name, bigger)
+        self.ids[slot] = card
+        self.ease[slot] = INITIAL_EASE
+        self.interval[slot] = 0
+        self.stability[slot] = 0
+        self.due[slot] = np.inf
+        self.last[slot] = 0
+        self.reps[slot] = 0
+        self.lapses[slot] = 0
+        self._slots[card] = slot
+        self._n += 1
+        return slot
+
+    # ---------------------- ids ----------------------
+    def card(self, row_id: int, verb: str) -> int:
+        return int(row_id) * self.n_verbs + self._verb_pos[verb]
+
+    def split(self, card: int) -> tuple:
+        """(fila, verbo) de una tarjeta."""
+        row_id, pos = divmod(int(card), self.n_verbs)
+        return row_id, self.index.verbs[pos]
+
+    def find(self, item) -> int:
+        """Tarjeta de un registro o pregunta (-1 si ya no está en el dataset)."""
+        modo, tiempo, nombre, pronombre, genere, verb = card_key(item)
+        rows = self.index.find(modo, tiempo, nombre, pronombre, genere or "M")
+        if len(rows) == 0 or verb not in self._verb_pos:
+            return -1
+        return self.card(rows[0], verb)
+
+    # ---------------------- selección vectorizada ----------------------
+    def recall(self, now: float, slots: np.ndarray = None) -> np.ndarray:
+        """Probabilidad estimada de recordar cada tarjeta vista (o solo ``slots``) en ``now``."""
+        if slots is None:
+            slots = slice(0, self._n)
+        elapsed = np.maximum(now - self.last[slots], 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = TARGET_RECALL ** (elapsed / np.maximum(self.stability[slots], 1))
+        return np.where(np.isfinite(self.due[slots]), r, 1.0)
+
+    def due_slots(self, now: float, rows_mask: np.ndarray = None, verbs=None) -> np.ndarray:
+        """Posiciones de las tarjetas vencidas dentro de los filtros."""
+        due = self.due[: self._n] <= now
+        if rows_mask is not None or verbs is not None:
+            rows, pos = np.divmod(self.ids[: self._n], self.n_verbs)
+            if rows_mask is not None:
+                due &= rows_mask[rows]
+            if verbs is not None:
+                wanted = np.zeros(self.n_verbs, dtype=bool)
+                wanted[[self._verb_pos[v] for v in verbs if v in self._verb_pos]] = True
+                due &= wanted[pos]
+        return np.flatnonzero(due)
+
+    def next_due(self, now: float, rows_mask: np.ndarray = None, verbs=None):
+        """
+        Tarjeta vencida con mayor prioridad (menor recuerdo estimado, más
+        fallos primero; a igualdad, la de menor id) o None si no hay ninguna
+        dentro de los filtros.
+        """
+        slots = self.due_slots(now, rows_mask, verbs)
+        if len(slots) == 0:
+            return None
+        priority = (1 - self.recall(now, slots)) + 0.01 * self.lapses[slots]
+        best = slots[priority == priority.max()]
+        return int(self.ids[best].min())
+
+    def due_count(self, now: float) -> int:
+        return int((self.due[: self._n] <= now).sum())
+
+    def learning_count(self) -> int:
+        """Tarjetas cuya última respuesta fue incorrecta (pendientes de repetir)."""
+        n = self._n
+        return int(((self.lapses[:n] > 0) & (self.reps[:n] == 0)).sum())
+
+    # ---------------------- actualización ----------------------
+    def review(self, card: int, correct: bool, now: float) -> None:
+        """Aplica una respuesta a la tarjeta (SM-2 + estabilidad)."""
+        s = self._slot(card)
+        r = 1.0
+        if np.isfinite(self.due[s]):
+            elapsed = max(now - self.last[s], 0)
+            r = TARGET_RECALL ** (elapsed / max(float(self.stability[s]), 1))
+        quality = 5 if correct else 2
+        ease = self.ease[s] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+        self.ease[s] = max(MIN_EASE, ease)
+
+        if correct:
+            if self.reps[s] == 0:
+                stability = max(self.stability[s], FIRST_INTERVAL)
+            else:
+                # Acertar con recuerdo bajo hace crecer más la estabilidad
+                stability = self.stability[s] * self.ease[s] * (2 - r)
+            self.reps[s] += 1
+            self.interval[s] = max(1.0, round(float(stability)))
+        else:
+            stability = max(1.0, self.stability[s] * 0.3)
+            self.reps[s] = 0
+            self.lapses[s] += 1
+            self.interval[s] = LAPSE_INTERVAL
+        self.stability[s] = stability
+        self.last[s] = now
+        self.due[s] = now + self.interval[s]
+        self._changes[card] = None
+
+    def postpone(self, card: int, now: float, delay: int = LAPSE_INTERVAL) -> None:
+        """Aleja una tarjeta ya mostrada para que no se repita si se salta."""
+        self.due[self._slot(card)] = now + delay
+        self._changes[card] = None
+
+    def drain_changes(self) -> list:
+        """Registros de las tarjetas modificadas desde la última llamada."""
+        changes = [self.record(c) for c in self._changes]
+        self._changes = {}
+        return changes
+
+    # ---------------------- serialización ----------------------
+    def record(self, card: int) -> list:
+        row_id, verb = self.split(card)
+        rec = self.index.record(row_id)
+        s = self._slots[card]
+        return [
+            rec["Modo"],
+            rec["Tiempo"],
+            rec["Nombre"],
+            rec["Pronombre"],
+            rec["Genere"],
+            verb,
+            round(float(self.ease[s]), 3),
+            float(self.interval[s]),
+            float(self.due[s]),
+            float(self.last[s]),
+            round(float(self.stability[s]), 3),
+            int(self.reps[s]),
+            int(self.lapses[s]),
+        ]
+
+    def to_json(self) -> dict:
+        """Solo las tarjetas vistas, en filas compactas con ``CARD_FIELDS``."""
+        n = self._n
+        seen = self.ids[:n][np.isfinite(self.due[:n])]
+        return {"fields": CARD_FIELDS, "items": [self.record(int(c)) for c in np.sort(seen)]}
+
+    def load(self, items) -> None:
+        """Carga registros (listas con ``CARD_FIELDS`` o dicts); ignora los huérfanos."""
+        for it in items:
+            if isinstance(it, dict):
+                it = [it.get(f) for f in CARD_FIELDS]
+            card = self.find(it)
+            if card < 0:
+                continue
+            s = self._slot(card)
+            ease, interval, due, last, stability, reps, lapses = it[6:]
+            self.ease[s] = ease
+            self.interval[s] = interval
+            self.due[s] = due
+            self.last[s] = last
+            self.stability[s] = stability
+            self.reps[s] = reps
+            self.lapses[s] = lapses
+
+    @classmethod
+    def from_json(cls, index, data) -> "CardModel":
+        """
+        Acepta un ``CardModel`` existente, ``{"fields", "items"}`` o el dict
+        {clave: registro} que arma el journal al reproducir eventos.
+        """
+        if isinstance(data, cls):
+            return data
+        model = cls(index)
+        if isinstance(data, dict):
+            items = data.get("items", []) if "fields" in data else data.values()
+            model.load(items)
+        elif data:
+            model.load(data)
+        return model
+
+    def absorb_repeat_queue(self, items) -> int:
+        """
+        Migra items de la cola de repetición anterior (intervalo fijo) como
+        tarjetas falladas; las tarjetas que ya tienen estado no se tocan.
+        """
+        moved = 0
+        for it in items:
+            card = self.find({**it, "genere": it.get("genere") or "M"})
+            if card < 0 or (card in self._slots and np.isfinite(self.due[self._slots[card]])):
+                continue
+            s = self._slot(card)
+            self.lapses[s] = max(1, int(it.get("attempts") or 1))
+            self.interval[s] = it.get("interval") or LAPSE_INTERVAL
+            self.stability[s] = 1.0
+            self.last[s] = float(it.get("scheduled_at", 0)) - self.interval[s]
+            self.due[s] = float(it.get("scheduled_at", 0))
+            self._changes[card] = None
+            moved += 1
+        return moved
@@ -0,0 +1,30 @@
+"""Procesamiento de bloques en orden, en el proceso actual o en un pool.
+
+Lo usan las herramientas por lotes (``grade_sheets``, ``import_verbs``): leen
+un archivo grande por bloques, aplican la misma función a cada uno y
+consumen los resultados en el orden de entrada.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def map_chunks(fn, chunks, jobs: int = 1, initializer=None, initargs=()):
+    """
+    ``fn(chunk)`` para cada bloque, en orden. Con ``jobs > 1`` reparte los
+    bloques en un pool de procesos (cada worker corre ``initializer`` una vez)
+    y mantiene como mucho ``2 * jobs`` bloques en vuelo.
+    """
+    if jobs <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for chunk in chunks:
+            yield fn(chunk)
+        return
+    with ProcessPoolExecutor(jobs, initializer=initializer, initargs=initargs) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(fn, chunk))
+            if len(pending) >= 2 * jobs:  # acota los bloques en memoria
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
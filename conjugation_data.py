@@ -0,0 +1,225 @@
+"""Carga del dataset de conjugaciones en formato largo (una forma por fila).
+
+Acepta el CSV "ancho" histórico (una columna por verbo) o un CSV largo con
+columnas ``Verbo, Modo, Tiempo, Nombre, Pronombre, Genere, Forma``. El
+resultado se codifica en enteros y se guarda como bundle binario en
+``.cache/<nombre>.bundle`` para que los arranques siguientes no vuelvan a
+parsear el CSV.
+
+Bundle (``.bundle``, versionado): cabecera JSON con la tabla de secciones y,
+alineadas a 64 bytes, un pool de strings UTF-8 (separados por NUL) con su
+tabla de offsets, los códigos int32 de cada columna, el vocabulario de cada
+columna como ids del pool y la forma normalizada de cada forma correcta
+(``Forma_keys``). Se abre con ``mmap``: no se parsea nada y varios procesos
+del mismo host comparten las páginas del archivo. ``build_bundle.py``
+compila uno o varios CSV en un bundle para distribuir.
+"""
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import atomic_write
+from grading import normalize_many
+
+KEY_COLUMNS = ["Modo", "Tiempo", "Nombre", "Pronombre", "Genere"]
+LONG_COLUMNS = ["Verbo"] + KEY_COLUMNS + ["Forma"]
+
+# Encabezados alternativos aceptados en los CSV largos
+LONG_ALIASES = {
+    "verb": "Verbo",
+    "mode": "Modo",
+    "tense": "Tiempo",
+    "name": "Nombre",
+    "pronoun": "Pronombre",
+    "gender": "Genere",
+    "form": "Forma",
+}
+
+CACHE_VERSION = 2
+
+BUNDLE_MAGIC = b"CONJBNDL"
+BUNDLE_VERSION = 1
+BUNDLE_SUFFIX = ".bundle"
+_ALIGN = 64
+
+
+def to_long(raw: pd.DataFrame) -> pd.DataFrame:
+    """Convierte un DataFrame ancho o largo al formato largo con strings limpios."""
+    raw = raw.rename(columns=LONG_ALIASES)
+    if "Verbo" not in raw.columns:
+        verb_cols = [c for c in raw.columns if c not in KEY_COLUMNS]
+        raw = raw.melt(
+            id_vars=KEY_COLUMNS, value_vars=verb_cols, var_name="Verbo", value_name="Forma"
+        )
+    long = raw[LONG_COLUMNS].dropna(subset=["Forma"])
+    long = long.astype(str).apply(lambda s: s.str.strip())
+    return long.reset_index(drop=True)
+
+
+def encode(long: pd.DataFrame) -> dict:
+    """Codifica cada columna como (códigos int32, vocabulario) en orden de aparición."""
+    arrays = {}
+    for col in LONG_COLUMNS:
+        codes, vocab = pd.factorize(long[col])
+        arrays[f"{col}_codes"] = codes.astype(np.int32)
+        arrays[f"{col}_vocab"] = np.asarray(vocab, dtype=str)
+    return arrays
+
+
+def decode(arrays) -> pd.DataFrame:
+    """Reconstruye el DataFrame largo con columnas categóricas (sin copiar strings)."""
+    return pd.DataFrame(
+        {
+            col: pd.Categorical.from_codes(
+                arrays[f"{col}_codes"], categories=list(arrays[f"{col}_vocab"])
+            )
+            for col in LONG_COLUMNS
+        }
+    )
+
+
+def cache_path(path: str) -> str:
+    folder, name = os.path.split(os.path.abspath(path))
+    return os.path.join(folder, ".cache", os.path.splitext(name)[0] + BUNDLE_SUFFIX)
+
+
+def _source_stamp(path: str) -> list:
+    st = os.stat(path)
+    return [CACHE_VERSION, st.st_mtime_ns, st.st_size]
+
+
+# ============================================================
+#                 BUNDLE BINARIO (MMAP)
+# ============================================================
+class SharedAttr:
+    """
+    Valor de ``DataFrame.attrs`` que viaja por referencia: pandas hace
+    deepcopy de ``attrs`` en cada operación y con listas grandes eso domina
+    el tiempo de cualquier filtro o ``astype``.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def write_bundle(long: pd.DataFrame, path: str, source=None) -> None:
+    """
+    Escribe la tabla larga ``long`` como bundle en ``path`` (atómico).
+    ``source`` se guarda en la cabecera para validar cachés.
+    """
+    arrays = encode(long)
+    form_vocab = arrays["Forma_vocab"]
+    form_keys = normalize_many(form_vocab)
+
+    # Pool único de strings para todas las columnas (+ las formas normalizadas)
+    pool: dict = {}
+    for col in LONG_COLUMNS:
+        pool.update(dict.fromkeys(arrays[f"{col}_vocab"].tolist()))
+    pool.update(dict.fromkeys(form_keys.tolist()))
+    strings = list(pool)
+    ids = {s: i for i, s in enumerate(strings)}
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    # +1 por el separador NUL que sigue a cada string
+    np.cumsum([len(b) + 1 for b in encoded], out=offsets[1:])
+
+    sections = {
+        "pool_offsets": offsets,
+        "pool_bytes": np.frombuffer(b"\0".join(encoded) + b"\0", dtype=np.uint8),
+        "Forma_keys": np.asarray([ids[k] for k in form_keys], dtype=np.int32),
+    }
+    for col in LONG_COLUMNS:
+        sections[f"{col}_codes"] = arrays[f"{col}_codes"].astype(np.int32)
+        sections[f"{col}_vocab"] = np.asarray([ids[v] for v in arrays[f"{col}_vocab"]], dtype=np.int32)
+
+    # Cabecera con offsets absolutos: se calcula hasta que su tamaño se estabiliza
+    header = {"version": BUNDLE_VERSION, "rows": len(long), "source": source, "sections": {}}
+    while True:
+        prefix = len(BUNDLE_MAGIC) + 8 + len(json.dumps(header).encode("utf-8"))
+        offset, table = prefix, {}
+        for name, arr in sections.items():
+            offset = -(-offset // _ALIGN) * _ALIGN
+            table[name] = [offset, arr.dtype.str, len(arr)]
+            offset += arr.nbytes
+        if table == header["sections"]:
+            break
+        header["sections"] = table
+
+    with atomic_write(path, "wb") as f:
+        raw = json.dumps(header).encode("utf-8")
+        f.write(BUNDLE_MAGIC + struct.pack("<II", BUNDLE_VERSION, len(raw)) + raw)
+        for name, arr in sections.items():
+            f.write(b"\0" * (table[name][0] - f.tell()))
+            f.write(arr.tobytes())
+
+
+def open_bundle(path: str, source=None) -> pd.DataFrame:
+    """
+    Abre un bundle con ``mmap`` y devuelve la tabla larga con columnas
+    categóricas. Con ``source`` lanza ``ValueError`` si la cabecera no
+    coincide (caché desactualizada). ``df.attrs["form_keys"].value`` es un
+    dict {forma: forma normalizada}: sigue siendo válido en los DataFrames
+    derivados (pandas copia ``attrs``) aunque cambien filas o categorías.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[: len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+        raise ValueError(f"{path}: no es un bundle de conjugaciones")
+    version, size = struct.unpack_from("<II", mm, len(BUNDLE_MAGIC))
+    if version != BUNDLE_VERSION:
+        raise ValueError(f"{path}: versión de bundle {version} no soportada")
+    start = len(BUNDLE_MAGIC) + 8
+    header = json.loads(mm[start : start + size].decode("utf-8"))
+    if source is not None and header["source"] != list(source):
+        raise ValueError(f"{path}: bundle desactualizado")
+
+    def section(name: str) -> np.ndarray:
+        offset, dtype, count = header["sections"][name]
+        return np.frombuffer(mm, dtype=dtype, count=count, offset=offset)
+
+    # Un solo decode del pool; el split por NUL corta todos los strings en C
+    pool = section("pool_bytes").tobytes().decode("utf-8").split("\0")
+    df = pd.DataFrame(
+        {
+            col: pd.Categorical.from_codes(
+                section(f"{col}_codes"), categories=[pool[i] for i in section(f"{col}_vocab")]
+            )
+            for col in LONG_COLUMNS
+        }
+    )
+    forms = df["Forma"].cat.categories
+    df.attrs["form_keys"] = SharedAttr(dict(zip(forms, (pool[i] for i in section("Forma_keys")))))
+    return df
+
+
+def load_conjugations(path: str = "conjugazioni.csv") -> pd.DataFrame:
+    """
+    Lee el dataset: un ``.bundle`` se abre directamente; un CSV se sirve desde
+    su bundle en ``.cache/`` si está al día, si no se parsea y se recompila.
+    """
+    if path.endswith(BUNDLE_SUFFIX):
+        return open_bundle(path)
+    cached = cache_path(path)
+    stamp = _source_stamp(path)
+    if os.path.exists(cached):
+        try:
+            return open_bundle(cached, source=stamp)
+        except (OSError, ValueError, KeyError):
+            pass  # caché corrupta, vieja o de otra versión: se regenera
+
+    long = to_long(pd.read_csv(path))
+    try:
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        write_bundle(long, cached, source=stamp)
+        return open_bundle(cached)
+    except OSError:
+        return decode(encode(long))  # sin permisos de escritura: solo en memoria
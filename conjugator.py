@@ -0,0 +1,382 @@
+"""Motor de conjugación por reglas para verbos que no están en el CSV.
+
+Cubre los verbos regulares en -are y los -ere/-ire de una lista cerrada
+(incluidos los de -isc-), los tiempos compuestos con los auxiliares
+essere/avere (tomados de la tabla de referencia, es decir del CSV) y una tabla
+de excepciones para irregulares. Los verbos que no encajan en nada de eso no
+se conjugan: mejor sin pregunta que con una forma inventada.
+Los resultados se memorizan en un LRU.
+
+Uso como oráculo de regresión contra el dataset:
+
+    python conjugator.py conjugazioni.csv
+"""
+import sys
+from functools import lru_cache
+
+PERSONS = ["Io", "Tu", "Lui", "Noi", "Voi", "Loro"]
+PERSON_ALIASES = {"Lei": "Lui"}
+
+# (Modo, Tiempo, Nombre) -> tiempo simple interno
+SIMPLE_TENSES = {
+    ("Indicativo", "Presente", "Presente"): "presente",
+    ("Indicativo", "Passato", "Imperfetto"): "imperfetto",
+    ("Indicativo", "Futuro", "Semplice"): "futuro",
+    ("Remoto", "Passato", "Remoto"): "remoto",
+    ("Congiuntivo", "Presente", "Congiuntivo Presente"): "cong_presente",
+    ("Congiuntivo", "Passato", "Congiuntivo imperfetto"): "cong_imperfetto",
+    ("Condizionale", "Presente", "Condizionale presente"): "cond_presente",
+}
+
+# (Modo, Tiempo, Nombre) compuesto -> tiempo simple del auxiliar
+COMPOUND_TENSES = {
+    ("Indicativo", "Passato", "Prossimo"): ("Indicativo", "Presente", "Presente"),
+    ("Indicativo", "Passato", "Trapassato prossimo"): ("Indicativo", "Passato", "Imperfetto"),
+    ("Indicativo", "Futuro", "Anteriore"): ("Indicativo", "Futuro", "Semplice"),
+    ("Remoto", "Passato", "Trapassato Remoto"): ("Remoto", "Passato", "Remoto"),
+    ("Congiuntivo", "Passato", "Congiuntivo passato"): ("Congiuntivo", "Presente", "Congiuntivo Presente"),
+    ("Congiuntivo", "Passato", "Congiuntivo trapassato"): ("Congiuntivo", "Passato", "Congiuntivo imperfetto"),
+    ("Condizionale", "Passato", "Condizionale passato"): ("Condizionale", "Presente", "Condizionale presente"),
+}
+
+ENDINGS = {
+    "are": {
+        "presente": ["o", "i", "a", "iamo", "ate", "ano"],
+        "remoto": ["ai", "asti", "ò", "ammo", "aste", "arono"],
+        "cong_presente": ["i", "i", "i", "iamo", "iate", "ino"],
+    },
+    "ere": {
+        "presente": ["o", "i", "e", "iamo", "ete", "ono"],
+        "remoto": ["ei", "esti", "é", "emmo", "este", "erono"],
+        "cong_presente": ["a", "a", "a", "iamo", "iate", "ano"],
+    },
+    "ire": {
+        "presente": ["o", "i", "e", "iamo", "ite", "ono"],
+        "remoto": ["ii", "isti", "ì", "immo", "iste", "irono"],
+        "cong_presente": ["a", "a", "a", "iamo", "iate", "ano"],
+    },
+}
+ISC_PRESENTE = ["isco", "isci", "isce", "iamo", "ite", "iscono"]
+ISC_CONG_PRESENTE = ["isca", "isca", "isca", "iamo", "iate", "iscano"]
+IMPERFETTO = ["vo", "vi", "va", "vamo", "vate", "vano"]
+CONG_IMPERFETTO = ["ssi", "ssi", "sse", "ssimo", "ste", "ssero"]
+FUTURO = ["ò", "ai", "à", "emo", "ete", "anno"]
+CONDIZIONALE = ["ei", "esti", "ebbe", "emmo", "este", "ebbero"]
+
+# Terminaciones alternativas igual de correctas (credé / credette)
+VARIANT_ENDINGS = {
+    ("ere", "remoto"): ["etti", "esti", "ette", "emmo", "este", "ettero"],
+}
+
+ISC_VERBS = {
+    "agire", "capire", "chiarire", "colpire", "costruire", "definire", "favorire",
+    "ferire", "finire", "fornire", "garantire", "gestire", "guarire", "impedire",
+    "obbedire", "preferire", "pulire", "punire", "reagire", "restituire",
+    "riferire", "sostituire", "sparire", "spedire", "stabilire", "suggerire",
+    "tradire", "trasferire", "unire",
+}
+
+ESSERE_VERBS = {
+    "andare", "arrivare", "cadere", "diventare", "entrare", "essere", "morire",
+    "nascere", "partire", "restare", "riuscire", "rimanere", "sparire", "stare",
+    "tornare", "uscire", "venire",
+}
+
+# Excepciones por verbo: tiempos completos (6 formas), raíz de futuro/
+# condicional, tema del imperfetto (``tema``; ``cong_tema`` si el congiuntivo
+# imperfetto usa otro) y participio.
+IRREGULAR = {
+    "andare": {
+        "presente": ["vado", "vai", "va", "andiamo", "andate", "vanno"],
+        "cong_presente": ["vada", "vada", "vada", "andiamo", "andiate", "vadano"],
+        "futuro_stem": "andr",
+    },
+    "dare": {
+        "presente": ["do", "dai", "dà", "diamo", "date", "danno"],
+        "remoto": ["diedi", "desti", "diede", "demmo", "deste", "diedero"],
+        "cong_presente": ["dia", "dia", "dia", "diamo", "diate", "diano"],
+        "futuro_stem": "dar",
+        "cong_tema": "de",
+    },
+    "dire": {
+        "presente": ["dico", "dici", "dice", "diciamo", "dite", "dicono"],
+        "remoto": ["dissi", "dicesti", "disse", "dicemmo", "diceste", "dissero"],
+        "cong_presente": ["dica", "dica", "dica", "diciamo", "diciate", "dicano"],
+        "futuro_stem": "dir",
+        "tema": "dice",
+        "participio": "detto",
+    },
+    "cadere": {
+        "remoto": ["caddi", "cadesti", "cadde", "cademmo", "cadeste", "caddero"],
+        "futuro_stem": "cadr",
+    },
+    "dovere": {
+        "presente": ["devo", "devi", "deve", "dobbiamo", "dovete", "devono"],
+        "cong_presente": ["debba", "debba", "debba", "dobbiamo", "dobbiate", "debbano"],
+        "futuro_stem": "dovr",
+    },
+    "fare": {
+        "presente": ["faccio", "fai", "fa", "facciamo", "fate", "fanno"],
+        "remoto": ["feci", "facesti", "fece", "facemmo", "faceste", "fecero"],
+        "cong_presente": ["faccia", "faccia", "faccia", "facciamo", "facciate", "facciano"],
+        "futuro_stem": "far",
+        "tema": "face",
+        "participio": "fatto",
+    },
+    "mettere": {
+        "remoto": ["misi", "mettesti", "mise", "mettemmo", "metteste", "misero"],
+        "participio": "messo",
+    },
+    "morire": {
+        "presente": ["muoio", "muori", "muore", "moriamo", "morite", "muoiono"],
+        "cong_presente": ["muoia", "muoia", "muoia", "moriamo", "moriate", "muoiano"],
+        "participio": "morto",
+    },
+    "nascere": {
+        "remoto": ["nacqui", "nascesti", "nacque", "nascemmo", "nasceste", "nacquero"],
+        "participio": "nato",
+    },
+    "potere": {
+        "presente": ["posso", "puoi", "può", "possiamo", "potete", "possono"],
+        "cong_presente": ["possa", "possa", "possa", "possiamo", "possiate", "possano"],
+        "futuro_stem": "potr",
+    },
+    "prendere": {
+        "remoto": ["presi", "prendesti", "prese", "prendemmo", "prendeste", "presero"],
+        "participio": "preso",
+    },
+    "rimanere": {
+        "presente": ["rimango", "rimani", "rimane", "rimaniamo", "rimanete", "rimangono"],
+        "remoto": ["rimasi", "rimanesti", "rimase", "rimanemmo", "rimaneste", "rimasero"],
+        "cong_presente": ["rimanga", "rimanga", "rimanga", "rimaniamo", "rimaniate", "rimangano"],
+        "futuro_stem": "rimarr",
+        "participio": "rimasto",
+    },
+    "riuscire": {
+        "presente": ["riesco", "riesci", "riesce", "riusciamo", "riuscite", "riescono"],
+        "cong_presente": ["riesca", "riesca", "riesca", "riusciamo", "riusciate", "riescano"],
+    },
+    "sapere": {
+        "presente": ["so", "sai", "sa", "sappiamo", "sapete", "sanno"],
+        "remoto": ["seppi", "sapesti", "seppe", "sapemmo", "sapeste", "seppero"],
+        "cong_presente": ["sappia", "sappia", "sappia", "sappiamo", "sappiate", "sappiano"],
+        "futuro_stem": "sapr",
+    },
+    "stare": {
+        "presente": ["sto", "stai", "sta", "stiamo", "state", "stanno"],
+        "remoto": ["stetti", "stesti", "stette", "stemmo", "steste", "stettero"],
+        "cong_presente": ["stia", "stia", "stia", "stiamo", "stiate", "stiano"],
+        "futuro_stem": "star",
+        "cong_tema": "ste",
+    },
+    "uscire": {
+        "presente": ["esco", "esci", "esce", "usciamo", "uscite", "escono"],
+        "cong_presente": ["esca", "esca", "esca", "usciamo", "usciate", "escano"],
+    },
+    "vedere": {
+        "remoto": ["vidi", "vedesti", "vide", "vedemmo", "vedeste", "videro"],
+        "futuro_stem": "vedr",
+        "participio": "visto",
+    },
+    "venire": {
+        "presente": ["vengo", "vieni", "viene", "veniamo", "venite", "vengono"],
+        "remoto": ["venni", "venisti", "venne", "venimmo", "veniste", "vennero"],
+        "cong_presente": ["venga", "venga", "venga", "veniamo", "veniate", "vengano"],
+        "futuro_stem": "verr",
+        "participio": "venuto",
+    },
+    "volere": {
+        "presente": ["voglio", "vuoi", "vuole", "vogliamo", "volete", "vogliono"],
+        "remoto": ["volli", "volesti", "volle", "volemmo", "voleste", "vollero"],
+        "cong_presente": ["voglia", "voglia", "voglia", "vogliamo", "vogliate", "vogliano"],
+        "futuro_stem": "vorr",
+    },
+}
+
+# Verbos en -ere/-ire comprobados como regulares. Casi todos los -ere (y muchos
+# -ire) tienen remoto, participio o presente irregulares: sin excepción en
+# IRREGULAR ni entrada aquí (o en ISC_VERBS) no se conjugan por reglas.
+REGULAR_VERBS = {
+    "battere", "combattere", "credere", "ricevere", "ripetere", "temere", "vendere",
+    "avvertire", "consentire", "divertire", "dormire", "fuggire", "partire",
+    "seguire", "sentire", "servire", "vestire",
+}
+
+
+def can_conjugate(verb: str) -> bool:
+    """
+    True si el motor sabe derivar el verbo: irregulares con excepción, -are
+    regulares y los -ere/-ire conocidos (``REGULAR_VERBS``, ``ISC_VERBS``).
+    """
+    if verb in IRREGULAR or verb in REGULAR_VERBS or verb in ISC_VERBS:
+        return True
+    return len(verb) > 3 and verb.endswith("are")
+
+
+def _soften(stem: str, ending: str) -> str:
+    """Ajustes ortográficos de -care/-gare (cerchi) y -ciare/-giare/-iare (mangi)."""
+    if ending[:1] in ("i", "e"):
+        if stem.endswith(("c", "g")):
+            return stem + "h" + ending
+        if stem.endswith("i") and ending.startswith("i"):
+            return stem + ending[1:]
+    return stem + ending
+
+
+def _futuro_stem(verb: str) -> str:
+    stem, conj = verb[:-3], verb[-3:]
+    if conj == "are":
+        if stem.endswith(("ci", "gi")):
+            stem = stem[:-1]  # mangiare -> manger-
+        elif stem.endswith(("c", "g")):
+            stem += "h"  # cercare -> cercher-
+        return stem + "er"
+    return stem + conj[0] + "r"
+
+
+def _simple(verb: str, tense: str) -> list:
+    """Las seis formas de un tiempo simple (Io, Tu, Lui, Noi, Voi, Loro)."""
+    irr = IRREGULAR.get(verb, {})
+    if tense in irr:
+        return list(irr[tense])
+
+    stem, conj = verb[:-3], verb[-3:]
+    if tense in ("futuro", "cond_presente"):
+        fstem = irr.get("futuro_stem") or _futuro_stem(verb)
+        return [fstem + e for e in (FUTURO if tense == "futuro" else CONDIZIONALE)]
+    if tense in ("imperfetto", "cong_imperfetto"):
+        tema = irr.get("tema") or stem + conj[0]
+        if tense == "cong_imperfetto":
+            tema = irr.get("cong_tema") or tema  # davo pero dessi, stavo pero stessi
+        return [tema + e for e in (IMPERFETTO if tense == "imperfetto" else CONG_IMPERFETTO)]
+    if verb in ISC_VERBS and tense in ("presente", "cong_presente"):
+        return [stem + e for e in (ISC_PRESENTE if tense == "presente" else ISC_CONG_PRESENTE)]
+    endings = ENDINGS[conj][tense]
+    if conj == "are":
+        return [_soften(stem, e) for e in endings]
+    return [stem + e for e in endings]
+
+
+def variants(verb: str, tense: str) -> list:
+    """Formas alternativas (6 por juego) de un tiempo simple de un verbo regular."""
+    if tense in IRREGULAR.get(verb, {}):
+        return []
+    endings = VARIANT_ENDINGS.get((verb[-3:], tense))
+    return [[verb[:-3] + e for e in endings]] if endings else []
+
+
+def participle(verb: str, genere: str = "M", plural: bool = False) -> str:
+    """Participio pasado con concordancia (solo relevante con essere)."""
+    irr = IRREGULAR.get(verb, {})
+    base = irr.get("participio") or verb[:-3] + {"are": "ato", "ere": "uto", "ire": "ito"}[verb[-3:]]
+    ending = {("M", False): "o", ("M", True): "i", ("F", False): "a", ("F", True): "e"}
+    return base[:-1] + ending[(genere if genere == "F" else "M", plural)]
+
+
+def auxiliary(verb: str) -> str:
+    return "essere" if verb in ESSERE_VERBS else "avere"
+
+
+class Conjugator:
+    """
+    Conjugador memorizado. ``reference(verb, modo, tiempo, nombre, pronombre,
+    genere)`` devuelve la forma del dataset (o None); se usa para los verbos
+    del CSV y para los auxiliares de los tiempos compuestos.
+    """
+
+    def __init__(self, reference=None, maxsize: int = 65536):
+        self.reference = reference
+        self.conjugate = lru_cache(maxsize=maxsize)(self._conjugate)
+
+    @staticmethod
+    def supports(modo, tiempo, nombre) -> bool:
+        """True si el tiempo (Modo, Tiempo, Nombre) tiene regla de derivación."""
+        key = (modo, tiempo, nombre)
+        return key in SIMPLE_TENSES or key in COMPOUND_TENSES
+
+    def _lookup(self, verb, modo, tiempo, nombre, pronombre, genere):
+        if self.reference is None:
+            return None
+        return self.reference(verb, modo, tiempo, nombre, pronombre, genere)
+
+    def _conjugate(self, verb, modo, tiempo, nombre, pronombre, genere="M"):
+        """Forma de ``verb`` para la combinación dada, o None si no se sabe derivar."""
+        # El alias va antes de la consulta: el dataset limpio no tiene "Lei"
+        pronombre = PERSON_ALIASES.get(pronombre, pronombre)
+        known = self._lookup(verb, modo, tiempo, nombre, pronombre, genere)
+        if known is not None:
+            return known
+        if pronombre not in PERSONS or not can_conjugate(verb):
+            return None
+        person = PERSONS.index(pronombre)
+        key = (modo, tiempo, nombre)
+
+        if key in SIMPLE_TENSES:
+            return _simple(verb, SIMPLE_TENSES[key])[person]
+        if key in COMPOUND_TENSES:
+            aux = auxiliary(verb)
+            aux_form = self.conjugate(aux, *COMPOUND_TENSES[key], pronombre, "M")
+            if aux_form is None:
+                return None
+            plural = aux == "essere" and person >= 3
+            part = participle(verb, genere, plural) if aux == "essere" else participle(verb)
+            return f"{aux_form} {part}"
+        return None
+
+
+def check_against(df_long, conjugator: Conjugator = None) -> list:
+    """
+    Compara las formas generadas por reglas con las del dataset (formato
+    largo); las variantes conocidas (``variants``) también valen. Devuelve
+    una lista de dicts con las diferencias.
+    """
+    conjugator = conjugator or Conjugator()
+    mismatches = []
+    for row in df_long.itertuples(index=False):
+        if row.Verbo in ("essere", "avere"):
+            continue  # los auxiliares salen del propio dataset
+        got = conjugator.conjugate(
+            row.Verbo, row.Modo, row.Tiempo, row.Nombre, row.Pronombre, row.Genere
+        )
+        tense = SIMPLE_TENSES.get((row.Modo, row.Tiempo, row.Nombre))
+        person = PERSON_ALIASES.get(row.Pronombre, row.Pronombre)
+        accepted = {got}
+        if person in PERSONS:
+            accepted.update(forms[PERSONS.index(person)] for forms in variants(row.Verbo, tense))
+        if row.Forma not in accepted:
+            mismatches.append(
+                {
+                    "verb": row.Verbo,
+                    "modo": row.Modo,
+                    "tiempo": row.Tiempo,
+                    "nombre": row.Nombre,
+                    "pronombre": row.Pronombre,
+                    "expected": row.Forma,
+                    "generated": got,
+                }
+            )
+    return mismatches
+
+
+def reference_from(df_long, verbs=("essere", "avere")):
+    """Función ``reference`` a partir de las filas del dataset de ``verbs``."""
+    sub = df_long[df_long["Verbo"].isin(verbs)].astype(str)
+    table = {
+        (r.Verbo, r.Modo, r.Tiempo, r.Nombre, r.Pronombre, r.Genere): r.Forma
+        for r in sub.itertuples(index=False)
+    }
+    return lambda *key: table.get(key)
+
+
+if __name__ == "__main__":
+    from conjugation_data import load_conjugations
+
+    data = load_conjugations(sys.argv[1] if len(sys.argv) > 1 else "conjugazioni.csv").astype(str)
+    diffs = check_against(data, Conjugator(reference_from(data)))
+    for d in diffs:
+        print(
+            f"{d['verb']:<12} {d['modo']} / {d['nombre']} / {d['pronombre']}: "
+            f"csv={d['expected']!r} reglas={d['generated']!r}"
+        )
+    print(f"{len(diffs)} diferencias")
+    sys.exit(1 if diffs else 0)
@@ -0,0 +1,236 @@
+"""Validación del dataset de conjugaciones (CSV ancho o largo).
+
+Todas las comprobaciones son vectorizadas sobre la tabla larga completa, con
+las celdas vacías conservadas (``to_long`` las descarta):
+
+- ``columns``: faltan columnas obligatorias.
+- ``missing``: celdas vacías en las claves o formas que faltan por verbo.
+- ``duplicates``: la misma clave (verbo + modo + tiempo + nombre + pronombre +
+  género) repetida, con formas iguales o distintas.
+- ``vocabulary``: pronombres o géneros que la app no conoce.
+- ``pronouns``: personas que faltan en un tiempo de un verbo.
+- ``agreement``: participio con essere que no concuerda con género/número.
+- ``unreachable``: filas que la limpieza de la app descarta y valores que los
+  filtros ofrecen sin ninguna pregunta detrás.
+
+Cada problema es un dict ``{"check", "level", "message", "count", "examples"}``
+con ``level`` = ``error`` (la app responde mal) o ``warning`` (faltan
+preguntas). Las combinaciones de filtros con preguntas se precalculan en el
+índice (``QuestionIndex.options``), que es lo que usa la UI.
+
+    python dataset_checks.py conjugazioni.csv [--json]
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from conjugation_data import KEY_COLUMNS, LONG_ALIASES, LONG_COLUMNS
+from conjugator import COMPOUND_TENSES, PERSON_ALIASES, PERSONS, auxiliary
+from quiz_engine import PRON_ORDER, clean_conjugations
+
+GENERI = ("M", "F")
+PLURAL = ("Noi", "Voi", "Loro")
+MAX_EXAMPLES = 5
+
+
+def _issue(check: str, level: str, message: str, rows: pd.DataFrame = None, count: int = None) -> dict:
+    examples = []
+    if rows is not None:
+        head = rows.head(MAX_EXAMPLES).astype(object)
+        examples = head.where(head.notna(), None).to_dict("records")
+    return {
+        "check": check,
+        "level": level,
+        "message": message,
+        "count": int(len(rows) if count is None else count),
+        "examples": examples,
+    }
+
+
+def long_with_gaps(raw: pd.DataFrame) -> pd.DataFrame:
+    """Como ``to_long`` pero conservando las celdas vacías (como ``<NA>``)."""
+    raw = raw.rename(columns=LONG_ALIASES)
+    if "Verbo" not in raw.columns:
+        verb_cols = [c for c in raw.columns if c not in KEY_COLUMNS]
+        raw = raw.melt(id_vars=KEY_COLUMNS, value_vars=verb_cols, var_name="Verbo", value_name="Forma")
+    long = raw[LONG_COLUMNS].astype("string").apply(lambda s: s.str.strip())
+    return long.mask(long == "").reset_index(drop=True)
+
+
+# ============================================================
+#                     COMPROBACIONES
+# ============================================================
+def check_columns(raw: pd.DataFrame) -> list:
+    columns = set(raw.rename(columns=LONG_ALIASES).columns)
+    wide = "Verbo" not in columns
+    required = KEY_COLUMNS if wide else LONG_COLUMNS
+    issues = []
+    absent = [c for c in required if c not in columns]
+    if absent:
+        issues.append(_issue("columns", "error", f"faltan columnas: {', '.join(absent)}", count=len(absent)))
+    elif wide and not columns - set(KEY_COLUMNS):
+        issues.append(_issue("columns", "error", "el CSV ancho no tiene columnas de verbos", count=1))
+    return issues
+
+
+def check_missing(long: pd.DataFrame) -> list:
+    issues = []
+    null_keys = long[KEY_COLUMNS + ["Verbo"]].isna()
+    for col in null_keys.columns[null_keys.any()]:
+        rows = long[null_keys[col]]
+        issues.append(_issue("missing", "error", f"celdas vacías en {col}", rows))
+    no_form = long["Forma"].isna() & ~null_keys.any(axis=1)
+    if no_form.any():
+        rows = long[no_form]
+        per_verb = rows["Verbo"].value_counts()
+        detail = ", ".join(f"{v} ({n})" for v, n in per_verb.head(MAX_EXAMPLES).items())
+        issues.append(_issue("missing", "warning", f"formas vacías por verbo: {detail}", rows))
+    return issues
+
+
+def check_duplicates(long: pd.DataFrame) -> list:
+    keys = ["Verbo"] + KEY_COLUMNS
+    dup = long[long.duplicated(subset=keys, keep=False) & long["Forma"].notna()]
+    if dup.empty:
+        return []
+    distinct = dup.groupby(keys, observed=True, dropna=False)["Forma"].transform("nunique")
+    issues = []
+    conflicting = dup[distinct > 1]
+    if not conflicting.empty:
+        issues.append(_issue("duplicates", "error", "claves repetidas con formas distintas", conflicting))
+    same = dup[(distinct == 1) & dup.duplicated(subset=keys)]
+    if not same.empty:
+        issues.append(_issue("duplicates", "warning", "claves repetidas con la misma forma", same))
+    return issues
+
+
+def check_vocabulary(long: pd.DataFrame) -> list:
+    issues = []
+    for col, known in (("Pronombre", PRON_ORDER), ("Genere", GENERI)):
+        unknown = long[long[col].notna() & ~long[col].isin(known)]
+        if not unknown.empty:
+            values = ", ".join(sorted(unknown[col].unique()))
+            issues.append(_issue("vocabulary", "error", f"{col} desconocido: {values}", unknown))
+    return issues
+
+
+def check_pronouns(long: pd.DataFrame) -> list:
+    """Personas (Io…Loro, Lei cuenta como Lui) que faltan en cada tiempo de cada verbo."""
+    rows = long.dropna()
+    if rows.empty:
+        return []
+    tense = ["Verbo", "Modo", "Tiempo", "Nombre", "Genere"]
+    group = rows.groupby(tense, sort=False).ngroup().to_numpy()
+    person = pd.Categorical(rows["Pronombre"].replace(PERSON_ALIASES), categories=PERSONS).codes
+    present = np.zeros((group.max() + 1, len(PERSONS)), dtype=bool)
+    known = person >= 0
+    present[group[known], person[known]] = True
+    g, p = np.nonzero(~present)
+    if len(g) == 0:
+        return []
+    first = rows.drop_duplicates(tense)[tense].reset_index(drop=True)
+    gaps = first.iloc[g].assign(Pronombre=np.asarray(PERSONS)[p]).reset_index(drop=True)
+    return [_issue("pronouns", "warning", "personas que faltan en un tiempo", gaps)]
+
+
+def essere_forms(long: pd.DataFrame) -> set:
+    """Formas de essere en los tiempos que hacen de auxiliar (según el dataset)."""
+    aux_tenses = pd.MultiIndex.from_tuples(list(set(COMPOUND_TENSES.values())))
+    essere = long[long["Verbo"] == "essere"].dropna()
+    in_aux = pd.MultiIndex.from_frame(essere[["Modo", "Tiempo", "Nombre"]]).isin(aux_tenses)
+    return set(essere.loc[in_aux, "Forma"])
+
+
+def check_agreement(long: pd.DataFrame) -> list:
+    """Con essere el participio concuerda: stato/stata/stati/state."""
+    rows = long.dropna()
+    compound = pd.MultiIndex.from_frame(rows[["Modo", "Tiempo", "Nombre"]]).isin(list(COMPOUND_TENSES))
+    rows = rows[compound]
+    if rows.empty:
+        return []
+    # "sarò stato": la forma empieza con una forma de essere y un espacio
+    forms = rows["Forma"]
+    aux_forms = essere_forms(long)
+    if aux_forms:
+        with_essere = forms.str.startswith(tuple(f"{f} " for f in aux_forms))
+    else:
+        # Sin essere en el dataset: el auxiliar sale de la lista de reglas
+        with_essere = forms.str.contains(" ", regex=False) & (rows["Verbo"].map(auxiliary) == "essere")
+    with_essere = with_essere.to_numpy(dtype=bool)
+    plural = rows["Pronombre"].isin(PLURAL).to_numpy()
+    female = (rows["Genere"] == "F").to_numpy()
+    expected = np.where(plural, np.where(female, "e", "i"), np.where(female, "a", "o"))
+    wrong = with_essere & (forms.str[-1].to_numpy(dtype=object) != expected)
+    if not wrong.any():
+        return []
+    bad = rows[wrong].assign(esperado=expected[wrong])
+    return [_issue("agreement", "error", "participio con essere sin concordancia de género/número", bad)]
+
+
+def check_unreachable(long: pd.DataFrame) -> list:
+    """Filas que la limpieza de la app descarta y valores de filtro sin preguntas."""
+    rows = long.dropna().astype(str)
+    kept = clean_conjugations(rows)
+    issues = []
+    dropped = rows.drop(index=kept.index)
+    if not dropped.empty:
+        reasons = dropped[["Genere", "Pronombre"]].apply(
+            lambda s: s.where(s.isin(["F", "Lei"])), axis=0
+        ).stack().value_counts()
+        detail = ", ".join(f"{v} ({n})" for v, n in reasons.items())
+        issues.append(_issue("unreachable", "warning", f"filas descartadas por la app: {detail}", dropped))
+    for col, offered in (("Genere", GENERI), ("Pronombre", [p for p in PRON_ORDER if p != "Lei"])):
+        present = set(kept[col].astype(str).unique())
+        dead = [v for v in offered if v not in present]
+        if dead:
+            issues.append(
+                _issue("unreachable", "warning", f"{col} sin preguntas: {', '.join(dead)}", count=len(dead))
+            )
+    return issues
+
+
+CHECKS = [
+    check_missing,
+    check_duplicates,
+    check_vocabulary,
+    check_pronouns,
+    check_agreement,
+    check_unreachable,
+]
+
+
+def validate(raw: pd.DataFrame) -> list:
+    """Problemas del dataset ``raw`` (CSV ancho o largo tal como se leyó)."""
+    issues = check_columns(raw)
+    if issues:
+        return issues
+    long = long_with_gaps(raw)
+    for check in CHECKS:
+        issues.extend(check(long))
+    return issues
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Valida un dataset de conjugaciones.")
+    parser.add_argument("path", nargs="?", default="conjugazioni.csv")
+    parser.add_argument("--json", action="store_true", help="salida en JSON")
+    args = parser.parse_args(argv)
+
+    issues = validate(pd.read_csv(args.path))
+    if args.json:
+        print(json.dumps(issues, ensure_ascii=False, indent=2))
+    else:
+        for it in issues:
+            print(f"[{it['level']}] {it['check']}: {it['message']} ({it['count']})")
+            for ex in it["examples"]:
+                print(f"    {ex}")
+        if not issues:
+            print(f"{args.path}: sin problemas")
+    return 1 if any(it["level"] == "error" for it in issues) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Corrección offline de hojas de respuestas exportadas (CSV o JSONL).
+
+Cada fila trae ``verb, modo, nombre, pronombre, answer`` (``tiempo`` y
+``genere`` son opcionales; también se aceptan ``mode``, ``tense`` y
+``pronoun``). El archivo se lee por bloques, cada bloque se corrige de forma
+vectorizada contra la tabla de conjugaciones y el resultado se va escribiendo,
+así que la memoria no depende del tamaño de la entrada.
+
+    python grade_sheets.py respuestas.csv -o corregidas.csv --summary resumen.json -j 4
+"""
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+from chunk_pool import map_chunks
+from conjugation_data import load_conjugations
+from conjugator import Conjugator, reference_from
+from grading import AnswerChecker
+
+SHEET_ALIASES = {
+    "mode": "modo",
+    "tense": "nombre",
+    "pronoun": "pronombre",
+    "gender": "genere",
+    "provided": "answer",
+}
+KEYS = ["verb", "modo", "nombre", "pronombre", "genere"]
+
+# Estado por proceso (se inicializa una vez en cada worker)
+_table = None
+_checker = None
+_conjugator = None
+_tiempos = None
+
+
+def init_grader(data_path: str = "conjugazioni.csv") -> None:
+    """Carga la tabla de referencia y el corrector en el proceso actual."""
+    global _table, _checker, _conjugator, _tiempos
+    data = load_conjugations(data_path).astype(str)
+    _table = (
+        data.rename(
+            columns={
+                "Verbo": "verb",
+                "Modo": "modo",
+                "Nombre": "nombre",
+                "Pronombre": "pronombre",
+                "Genere": "genere",
+                "Forma": "correct",
+            }
+        )[KEYS + ["correct"]]
+        .drop_duplicates(subset=KEYS)
+    )
+    _checker = AnswerChecker(_table["correct"])
+    _conjugator = Conjugator(reference_from(data))
+    _tiempos = {(r.Modo, r.Nombre): r.Tiempo for r in data.drop_duplicates(["Modo", "Nombre"]).itertuples()}
+
+
+def grade_frame(sheet: pd.DataFrame) -> pd.DataFrame:
+    """Corrige un bloque de respuestas y agrega las columnas ``correct`` e ``is_correct``."""
+    sheet = sheet.rename(columns=SHEET_ALIASES)
+    if "genere" not in sheet.columns:
+        sheet["genere"] = "M"
+    keys = sheet[KEYS].astype(str).apply(lambda s: s.str.strip())
+    merged = keys.merge(_table, how="left", on=KEYS)
+
+    # Verbos fuera del dataset: se derivan por reglas
+    missing = merged["correct"].isna()
+    if missing.any():
+        merged.loc[missing, "correct"] = [
+            _conjugator.conjugate(
+                r.verb, r.modo, _tiempos.get((r.modo, r.nombre)), r.nombre, r.pronombre, r.genere
+            )
+            for r in merged[missing].itertuples()
+        ]
+
+    out = sheet.reset_index(drop=True)
+    out["correct"] = merged["correct"].to_numpy()
+    out["is_correct"] = _checker.grade(out["answer"], out["correct"]) & out["correct"].notna().to_numpy()
+    return out
+
+
+def read_sheet(path: str, chunksize: int):
+    """Itera bloques de la hoja de respuestas según la extensión del archivo."""
+    if path.endswith((".jsonl", ".json")):
+        return pd.read_json(path, lines=True, chunksize=chunksize, dtype=False)
+    return pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False)
+
+
+def write_chunk(chunk: pd.DataFrame, path: str, first: bool) -> None:
+    if path.endswith((".jsonl", ".json")):
+        with open(path, "w" if first else "a", encoding="utf-8") as f:
+            chunk.to_json(f, orient="records", lines=True, force_ascii=False)
+    else:
+        chunk.to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def grade_file(
+    path: str,
+    output: str,
+    data_path: str = "conjugazioni.csv",
+    chunksize: int = 50_000,
+    jobs: int = 1,
+) -> pd.DataFrame:
+    """Corrige ``path`` hacia ``output`` y devuelve la precisión por 'Nome del tempo'."""
+    totals: dict = {}
+    first = True
+    chunks = read_sheet(path, chunksize)
+    for graded in map_chunks(grade_frame, chunks, jobs, init_grader, (data_path,)):
+        write_chunk(graded, output, first)
+        first = False
+        counts = graded.groupby("nombre")["is_correct"].agg(["sum", "count"])
+        for nombre, row in counts.iterrows():
+            acc = totals.setdefault(nombre, [0, 0])
+            acc[0] += int(row["sum"])
+            acc[1] += int(row["count"])
+
+    summary = pd.DataFrame(
+        [(n, c, a) for n, (c, a) in totals.items()], columns=["nombre", "corrects", "attempts"]
+    )
+    summary["accuracy"] = summary["corrects"] / summary["attempts"].where(summary["attempts"] > 0) * 100
+    return summary.sort_values("accuracy").reset_index(drop=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Corrige hojas de respuestas de conjugación.")
+    parser.add_argument("input", help="CSV o JSONL con verb, modo, nombre, pronombre, answer")
+    parser.add_argument("-o", "--output", help="archivo de resultados (CSV o JSONL)")
+    parser.add_argument("--summary", help="JSON con la precisión por 'Nome del tempo'")
+    parser.add_argument("--data", default="conjugazioni.csv", help="dataset de conjugaciones")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="procesos para archivos grandes")
+    args = parser.parse_args(argv)
+
+    base, ext = os.path.splitext(args.input)
+    output = args.output or f"{base}.graded{ext or '.csv'}"
+    summary = grade_file(args.input, output, args.data, args.chunksize, args.jobs)
+
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary.to_dict(orient="records"), f, ensure_ascii=False, indent=2)
+    print(summary.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Normalización y corrección de respuestas.
+
+``normalize`` quita acentos y mayúsculas; los resultados de entradas de
+usuario se guardan en un LRU acotado. ``AnswerChecker`` precalcula la forma
+normalizada de todas las conjugaciones del dataset al cargarlo y ofrece una
+ruta por lotes (pandas) para corregir hojas de respuestas enteras.
+"""
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+@lru_cache(maxsize=16384)
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFD", text.strip())
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return text.lower()
+
+
+def normalize(text) -> str:
+    """Normaliza texto para comparar acentos y mayúsculas/minúsculas."""
+    return _normalize(str(text))
+
+
+def normalize_many(values) -> np.ndarray:
+    """
+    Normaliza un array/Series de textos. Cada valor distinto se normaliza una
+    sola vez (factorize + take), así que el costo depende de los únicos.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).astype(str))
+    normalized = np.asarray([_normalize(u) for u in uniques], dtype=object)
+    out = np.empty(len(codes), dtype=object)
+    valid = codes >= 0
+    out[valid] = normalized[codes[valid]]
+    out[~valid] = ""
+    return out
+
+
+class AnswerChecker:
+    """Formas correctas ya normalizadas + comparación individual o por lotes."""
+
+    def __init__(self, forms=(), known: dict = None):
+        """``known`` (opcional): formas ya normalizadas, p. ej. las del bundle."""
+        forms = list(dict.fromkeys(str(f) for f in forms))
+        known = known or {}
+        missing = [f for f in forms if f not in known]
+        self._keys = {f: known[f] for f in forms if f in known}
+        self._keys.update(zip(missing, normalize_many(missing)))
+
+    def key(self, correct) -> str:
+        """Forma normalizada de una respuesta correcta (precalculada si es del dataset)."""
+        correct = str(correct)
+        found = self._keys.get(correct)
+        return found if found is not None else _normalize(correct)
+
+    def check(self, provided, correct) -> bool:
+        """True si ``provided`` coincide con ``correct`` ignorando acentos y mayúsculas."""
+        return normalize(provided) == self.key(correct)
+
+    def grade(self, provided, correct) -> np.ndarray:
+        """Versión vectorizada de ``check`` para dos columnas alineadas."""
+        provided_keys = normalize_many(provided)
+        correct = pd.Series(correct, dtype=object).astype(str)
+        codes, uniques = pd.factorize(correct)
+        # El código -1 (respuesta correcta ausente) cae en el None final
+        keys = np.asarray([self.key(u) for u in uniques] + [None], dtype=object)
+        return provided_keys == keys[codes]
+
+
+def grade_answer(question: dict, provided: str, checker: AnswerChecker = None) -> tuple:
+    """
+    Corrige la respuesta a una pregunta y arma el registro del intento.
+    Devuelve ``(es_correcta, intento)`` con las claves de session_corrects/errors.
+    """
+    checker = checker or AnswerChecker()
+    attempt = {
+        "verb": question.get("verb"),
+        "modo": question.get("modo"),
+        "tiempo": question.get("tiempo"),
+        "nombre": question.get("nombre"),
+        "pronombre": question.get("pronombre"),
+        "provided": provided,
+        "correct": question.get("correct"),
+        "is_repeat": question.get("is_repeat", False),
+    }
+    return checker.check(provided, question.get("correct")), attempt
@@ -0,0 +1,364 @@
+"""Historial de intentos compacto y tablas de visualización cacheadas.
+
+``AttemptLog`` es la representación compacta del historial de la sesión: en
+vez de un dict por intento guarda códigos int32 (sobre ``StringPool``
+compartidos con la tabla de conjugaciones, salvo las respuestas del alumno,
+que van a un pool de cada log), la marca de repetición y la hora de cada
+intento en arrays tipados.
+"""
+import itertools
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+ATTEMPT_FIELDS = ["verb", "modo", "tiempo", "nombre", "pronombre", "provided", "correct", "is_repeat"]
+
+DISPLAY_NAMES = {
+    "verb": "Verbo",
+    "modo": "Modo",
+    "tiempo": "Tempo",
+    "nombre": "Serie",
+    "pronombre": "Pronome",
+    "provided": "Risposta data",
+    "correct": "Corretta",
+    "is_repeat": "Ripetizione",
+}
+
+
+# ============================================================
+#          HISTORIAL COMPACTO (CÓDIGOS + ARRAYS TIPADOS)
+# ============================================================
+# Campos de texto de un intento -> pool de strings del que salen sus códigos.
+# Lo que escribe el alumno es texto libre: va a un pool propio de cada log (que
+# se libera con él) y no al pool "form" compartido, que crecería sin límite.
+CODED_FIELDS = {
+    "verb": "verb",
+    "modo": "modo",
+    "tiempo": "tiempo",
+    "nombre": "nombre",
+    "pronombre": "pronombre",
+    "provided": "provided",
+    "correct": "form",
+}
+# Campos de la serialización compacta (progress.json)
+RECORD_FIELDS = ATTEMPT_FIELDS + ["ts"]
+
+
+class StringPool:
+    """Strings interned -> código int32. Solo crece; se comparte entre sesiones."""
+
+    def __init__(self, values=()):
+        self.values: list = list(dict.fromkeys(values))
+        self.codes: dict = {v: i for i, v in enumerate(self.values)}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value) -> int:
+        """Código de ``value`` (lo agrega si es nuevo); -1 para None."""
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self.codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(value)
+                    self.codes[value] = code
+        return code
+
+    def categorical(self, codes: np.ndarray) -> pd.Categorical:
+        """``Categorical`` de ``codes`` con solo las categorías usadas (el pool puede ser enorme)."""
+        used, inverse = np.unique(codes, return_inverse=True)
+        if len(used) and used[0] < 0:
+            # El -1 (None) queda primero: pasa a NaN y corre el resto
+            used, inverse = used[1:], inverse - 1
+        categories = pd.Index([self.values[c] for c in used], dtype=object)
+        return pd.Categorical.from_codes(inverse, categories=categories)
+
+
+def attempt_pools(verbs=(), modes=(), tiempos=(), nombres=(), pronouns=(), forms=()) -> dict:
+    """Pools para ``AttemptLog`` sembrados con los vocabularios de la tabla."""
+    return {
+        "verb": StringPool(verbs),
+        "modo": StringPool(modes),
+        "tiempo": StringPool(tiempos),
+        "nombre": StringPool(nombres),
+        "pronombre": StringPool(pronouns),
+        "form": StringPool(forms),
+    }
+
+
+class AttemptLog:
+    """
+    Intentos de la sesión en columnas tipadas: un código int32 por campo de
+    texto, ``is_repeat`` (bool) y ``ts`` (epoch, float64). ~37 bytes por
+    intento frente a un dict de ocho claves. Se comporta como la lista de
+    dicts de antes (``len``, índices, slices, iteración, ``append``) para los
+    stores de progreso, que siguen guardando los mismos registros.
+    """
+
+    __slots__ = ("pools", "_codes", "_repeat", "_ts", "_n", "version", "_frames")
+
+    def __init__(self, pools: dict = None, capacity: int = 64):
+        shared = pools if pools is not None else attempt_pools()
+        self.pools = {**shared, "provided": StringPool()}
+        self._codes = {f: np.empty(capacity, dtype=np.int32) for f in CODED_FIELDS}
+        self._repeat = np.empty(capacity, dtype=bool)
+        self._ts = np.empty(capacity, dtype=np.float64)
+        self._n = 0
+        self.version = 0
+        self._frames: dict = {}
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._ts)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for f, col in self._codes.items():
+            bigger = np.empty(capacity, dtype=np.int32)
+            bigger[: self._n] = col[: self._n]
+            self._codes[f] = bigger
+        for name in ("_repeat", "_ts"):
+            col = getattr(self, name)
+            bigger = np.empty(capacity, dtype=col.dtype)
+            bigger[: self._n] = col[: self._n]
+            setattr(self, name, bigger)
+
+    # ---------------------- escritura ----------------------
+    def append(self, attempt: dict) -> None:
+        """Agrega un intento (dict con ``ATTEMPT_FIELDS``; ``ts`` opcional)."""
+        self._grow(self._n + 1)
+        i = self._n
+        for f, pool in CODED_FIELDS.items():
+            value = attempt.get(f)
+            self._codes[f][i] = self.pools[pool].code(None if value is None else str(value))
+        self._repeat[i] = bool(attempt.get("is_repeat"))
+        self._ts[i] = attempt.get("ts") or time.time()
+        self._n += 1
+        self.version += 1
+        self._frames.clear()
+
+    def extend(self, attempts) -> None:
+        """
+        Agrega varios intentos en bloque (una asignación por columna). A
+        diferencia de ``append``, los que no traen ``ts`` (historial guardado
+        antes de registrar la hora) quedan sin hora (NaN).
+        """
+        attempts = list(attempts)
+        if not attempts:
+            return
+        start, end = self._n, self._n + len(attempts)
+        self._grow(end)
+        for f, pool in CODED_FIELDS.items():
+            code = self.pools[pool].code
+            self._codes[f][start:end] = [
+                code(None if (v := a.get(f)) is None else str(v)) for a in attempts
+            ]
+        self._repeat[start:end] = [bool(a.get("is_repeat")) for a in attempts]
+        self._ts[start:end] = [a.get("ts") or np.nan for a in attempts]
+        self._n = end
+        self.version += 1
+        self._frames.clear()
+
+    # ---------------------- lectura como lista ----------------------
+    def record(self, i: int) -> dict:
+        """El intento ``i`` como dict (mismas claves que ``grade_answer`` + ``ts``)."""
+        rec = {}
+        for f, pool in CODED_FIELDS.items():
+            code = self._codes[f][i]
+            rec[f] = self.pools[pool].values[code] if code >= 0 else None
+        rec["is_repeat"] = bool(self._repeat[i])
+        ts = float(self._ts[i])
+        rec["ts"] = ts if ts == ts else None
+        return rec
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.record(i) for i in range(*key.indices(self._n))]
+        if key < 0:
+            key += self._n
+        if not 0 <= key < self._n:
+            raise IndexError(key)
+        return self.record(key)
+
+    def __iter__(self):
+        return (self.record(i) for i in range(self._n))
+
+    def codes(self, field: str) -> np.ndarray:
+        """Vista (sin copia) de los códigos de ``field``."""
+        if field == "is_repeat":
+            return self._repeat[: self._n]
+        if field == "ts":
+            return self._ts[: self._n]
+        return self._codes[field][: self._n]
+
+    # ---------------------- DataFrames ----------------------
+    def to_frame(self, decode: bool = True, last: int = None) -> pd.DataFrame:
+        """
+        Todas las columnas. Con ``decode=False`` son vistas de los arrays
+        internos (sin copia); con ``decode=True`` los campos de texto son
+        ``Categorical`` con las categorías usadas (no se crea un string por fila).
+        """
+        start = 0 if last is None else max(0, self._n - last)
+        data = {}
+        for f, pool in CODED_FIELDS.items():
+            codes = self._codes[f][start : self._n]
+            data[f] = self.pools[pool].categorical(codes) if decode else codes
+        data["is_repeat"] = self._repeat[start : self._n]
+        data["ts"] = self._ts[start : self._n]
+        return pd.DataFrame(data, index=pd.RangeIndex(start, self._n), copy=False)
+
+    def frame(self, columns: list, last: int = None) -> pd.DataFrame:
+        """
+        DataFrame con ``columns`` renombradas para mostrar; con ``last`` solo
+        las últimas filas. Se reutiliza mientras no cambie la versión.
+        """
+        key = (tuple(columns), last)
+        cached = self._frames.get(key)
+        if cached is not None:
+            return cached
+        start = 0 if last is None else max(0, self._n - last)
+        data = {}
+        for c in columns:
+            if c in CODED_FIELDS:
+                values = self.pools[CODED_FIELDS[c]].values
+                data[DISPLAY_NAMES[c]] = [values[i] if i >= 0 else None for i in self._codes[c][start : self._n].tolist()]
+            else:
+                data[DISPLAY_NAMES[c]] = self.codes(c)[start:]
+        df = pd.DataFrame(data, index=pd.RangeIndex(start, self._n))
+        self._frames[key] = df
+        return df
+
+    # ---------------------- serialización ----------------------
+    def to_json(self) -> dict:
+        """Filas compactas con ``RECORD_FIELDS`` (en vez de un dict por intento)."""
+        return {"fields": RECORD_FIELDS, "items": [[r[f] for f in RECORD_FIELDS] for r in self]}
+
+    @classmethod
+    def from_json(cls, data, pools: dict = None) -> "AttemptLog":
+        """Acepta un ``AttemptLog``, ``{"fields", "items"}`` o la lista de dicts anterior."""
+        if isinstance(data, cls):
+            return data
+        log = cls(pools)
+        if isinstance(data, dict):
+            fields = data.get("fields", RECORD_FIELDS)
+            log.extend(dict(zip(fields, row)) for row in data.get("items", []))
+        elif data:
+            log.extend(data)
+        return log
+
+
+# ============================================================
+#          ESTADÍSTICAS INCREMENTALES DE RENDIMIENTO
+# ============================================================
+STAT_DIMENSIONS = ("nombre", "verb", "modo", "pronombre")
+# Versiones únicas en todo el proceso: una instancia nueva (reinicio, carga)
+# nunca repite la versión de otra, así sirven de clave de caché en la UI
+_STAT_VERSIONS = itertools.count(1)
+
+
+class PerformanceStats:
+    """
+    Contadores [correctas, errores] por nombre, verbo, modo y pronombre, más
+    celdas (verbo, pronombre, nombre) para filtrar el dashboard. Cada
+    respuesta los actualiza en O(1); el historial solo se recorre al cargar.
+    """
+
+    def __init__(self):
+        self.counts: dict = {d: {} for d in STAT_DIMENSIONS}
+        self.cells: dict = {}
+        self.version = next(_STAT_VERSIONS)
+        self._frames: dict = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.cells)
+
+    def record(self, attempt: dict, is_correct: bool) -> None:
+        slot = 0 if is_correct else 1
+        for d in STAT_DIMENSIONS:
+            self.counts[d].setdefault(str(attempt.get(d)), [0, 0])[slot] += 1
+        cell = (str(attempt.get("verb")), str(attempt.get("pronombre")), str(attempt.get("nombre")))
+        self.cells.setdefault(cell, [0, 0])[slot] += 1
+        self.version = next(_STAT_VERSIONS)
+        self._frames.clear()
+
+    def options(self, dim: str) -> list:
+        """Valores con al menos un intento en la dimensión ``dim``."""
+        return sorted(self.counts[dim])
+
+    def frame(self, dim: str = "nombre", verb: str = None, pronombre: str = None) -> pd.DataFrame:
+        """
+        Rendimiento por ``dim`` (columnas dim, corrects, errors, attempts,
+        accuracy). Con ``verb``/``pronombre`` se filtra por celdas.
+        """
+        key = (dim, verb, pronombre)
+        cached = self._frames.get(key)
+        if cached is not None:
+            return cached
+
+        if verb is None and pronombre is None:
+            rows = [(v, c, e) for v, (c, e) in self.counts[dim].items()]
+        else:
+            pos = {"verb": 0, "pronombre": 1, "nombre": 2}[dim]
+            totals: dict = {}
+            for cell, (c, e) in self.cells.items():
+                if (verb is None or cell[0] == verb) and (pronombre is None or cell[1] == pronombre):
+                    acc = totals.setdefault(cell[pos], [0, 0])
+                    acc[0] += c
+                    acc[1] += e
+            rows = [(v, c, e) for v, (c, e) in totals.items()]
+
+        perf = pd.DataFrame(rows, columns=[dim, "corrects", "errors"])
+        perf["attempts"] = perf["corrects"] + perf["errors"]
+        perf = perf[perf["attempts"] > 0].copy()
+        perf["accuracy"] = perf["corrects"] / perf["attempts"] * 100
+        self._frames[key] = perf
+        return perf
+
+    @classmethod
+    def from_history(cls, corrects=(), errors=()) -> "PerformanceStats":
+        """
+        Reconstruye los contadores desde el historial (no se guardan: se
+        recalculan al cargar). Un ``AttemptLog`` se cuenta sobre sus códigos.
+        """
+        stats = cls()
+        for slot, log in ((0, corrects), (1, errors)):
+            if isinstance(log, AttemptLog):
+                stats._count_log(log, slot)
+            else:
+                for it in log:
+                    stats.record(it, slot == 0)
+        return stats
+
+    def _count_log(self, log: AttemptLog, slot: int) -> None:
+        if not len(log):
+            return
+
+        def decoder(field):
+            values = log.pools[CODED_FIELDS[field]].values
+            # Igual que ``record``: str() del valor, "None" si falta
+            return lambda c: str(values[c]) if c >= 0 else "None"
+
+        for d in STAT_DIMENSIONS:
+            name = decoder(d)
+            codes, counts = np.unique(log.codes(d), return_counts=True)
+            for c, k in zip(codes.tolist(), counts.tolist()):
+                self.counts[d].setdefault(name(c), [0, 0])[slot] += k
+        cell_fields = ("verb", "pronombre", "nombre")
+        names = [decoder(f) for f in cell_fields]
+        stacked = np.stack([log.codes(f) for f in cell_fields], axis=1)
+        cells, counts = np.unique(stacked, axis=0, return_counts=True)
+        for row, k in zip(cells.tolist(), counts.tolist()):
+            cell = tuple(name(c) for name, c in zip(names, row))
+            self.cells.setdefault(cell, [0, 0])[slot] += k
+        self.version = next(_STAT_VERSIONS)
+        self._frames.clear()
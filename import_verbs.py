@@ -0,0 +1,189 @@
+"""Importación masiva de conjugaciones (CSV o JSONL, anchos o largos).
+
+Los archivos se leen por bloques y cada bloque se normaliza en un pool de
+procesos: espacios y Unicode (NFC) de las formas, verbos en minúscula y los
+vocabularios de ``Modo``/``Tiempo``/``Nombre``/``Pronombre``/``Genere``
+llevados a la grafía del dataset base (sin distinguir mayúsculas ni espacios,
+más algunos alias como ``maschile`` -> ``M``; cada valor distinto se mapea
+una sola vez por bloque). Verbos y formas se limpian con operaciones de
+strings vectorizadas.
+
+Después se une todo con el dataset base. Las claves repetidas con formas
+distintas dentro de los volcados se reportan (``check_duplicates``) antes de
+eliminar las repetidas (gana la última: el orden es base, archivos en orden,
+bloques en orden); luego se valida con ``dataset_checks`` y se escribe en el formato de la app: un
+``.bundle`` (ver ``conjugation_data``) o un CSV largo. Con errores de
+validación no se escribe nada salvo con ``--force``.
+
+    python import_verbs.py volcado1.csv volcado2.jsonl -o conjugazioni.bundle -j 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import atomic_write
+from chunk_pool import map_chunks
+from conjugation_data import KEY_COLUMNS, LONG_COLUMNS, load_conjugations, write_bundle
+from conjugator import COMPOUND_TENSES, SIMPLE_TENSES
+from dataset_checks import GENERI, check_duplicates, long_with_gaps, validate
+from quiz_engine import PRON_ORDER
+
+# Grafías alternativas (ya en minúscula y sin espacios extra) -> valor canónico
+VOCAB_ALIASES = {
+    "Genere": {"m": "M", "masc": "M", "maschile": "M", "f": "F", "fem": "F", "femminile": "F"},
+    "Pronombre": {"egli": "Lui", "ella": "Lei", "essi": "Loro"},
+}
+
+# Vocabulario canónico por columna (se inicializa una vez en cada worker)
+_vocab = None
+
+
+def _fold(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def canonical_vocab(base: pd.DataFrame = None) -> dict:
+    """{columna: {grafía plegada: valor canónico}} desde el dataset base y las reglas."""
+    values = {col: [] for col in KEY_COLUMNS}
+    for modo, tiempo, nombre in [*SIMPLE_TENSES, *COMPOUND_TENSES]:
+        values["Modo"].append(modo)
+        values["Tiempo"].append(tiempo)
+        values["Nombre"].append(nombre)
+    values["Pronombre"].extend(PRON_ORDER)
+    values["Genere"].extend(GENERI)
+    if base is not None:
+        for col in KEY_COLUMNS:
+            values[col].extend(base[col].astype(str).unique())
+    vocab = {}
+    for col, known in values.items():
+        vocab[col] = {_fold(v): v for v in known}
+        vocab[col].update(VOCAB_ALIASES.get(col, {}))
+    return vocab
+
+
+def init_importer(vocab: dict) -> None:
+    global _vocab
+    _vocab = vocab
+
+
+def _map_unique(values: pd.Series, fn) -> pd.Series:
+    """Aplica ``fn`` una vez por valor distinto de ``values``."""
+    codes, uniques = pd.factorize(values)
+    mapped = np.asarray([fn(u) for u in uniques] + [None], dtype=object)
+    return pd.Series(mapped[codes], index=values.index)
+
+
+def _squeeze(values: pd.Series) -> pd.Series:
+    """Espacios internos colapsados (vectorizado, sin pasar por Python)."""
+    return values.str.replace(r"\s+", " ", regex=True)
+
+
+def normalize_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bloque crudo -> tabla larga normalizada. Las claves repetidas se conservan:
+    se reportan y resuelven al unir todos los bloques (igual con cualquier
+    ``chunksize``).
+    """
+    # Las claves vacías se conservan (como nulos) para que las reporte la validación
+    long = long_with_gaps(chunk).dropna(subset=["Forma"])
+    out = {"Verbo": _squeeze(long["Verbo"]).str.lower()}
+    for col in KEY_COLUMNS:
+        known = _vocab[col]
+        out[col] = _map_unique(long[col], lambda v: known.get(_fold(v), v))
+    out["Forma"] = _squeeze(long["Forma"].str.normalize("NFC"))
+    return pd.DataFrame(out)[LONG_COLUMNS]
+
+
+def read_chunks(path: str, chunksize: int):
+    """Itera bloques crudos de un volcado según la extensión del archivo."""
+    if path.endswith((".jsonl", ".json")):
+        return pd.read_json(path, lines=True, chunksize=chunksize, dtype=False)
+    return pd.read_csv(path, chunksize=chunksize, dtype=str)
+
+
+def _all_chunks(paths: list, chunksize: int):
+    for path in paths:
+        yield from read_chunks(path, chunksize)
+
+
+def import_files(
+    paths: list,
+    base_path: str = "conjugazioni.csv",
+    chunksize: int = 200_000,
+    jobs: int = 1,
+) -> tuple:
+    """
+    Normaliza y une ``paths`` (sobre el dataset ``base_path`` si se indica).
+    Devuelve ``(tabla larga, estadísticas, problemas)``: los problemas son las
+    claves repetidas dentro de lo importado (``check_duplicates``), que hay que
+    mirar antes de quedarse con la última. No valida el resto ni escribe.
+    """
+    base = load_conjugations(base_path).astype(str) if base_path else None
+    vocab = canonical_vocab(base)
+    parts = [base[LONG_COLUMNS]] if base is not None else []
+    imported = 0
+    chunks = _all_chunks(paths, chunksize)
+    for chunk in map_chunks(normalize_chunk, chunks, jobs, init_importer, (vocab,)):
+        imported += len(chunk)
+        parts.append(chunk)
+    # Reemplazar el dataset base es lo esperado; dos formas distintas para la
+    # misma clave dentro de los volcados, no
+    dumps = parts[1:] if base is not None else parts
+    issues = check_duplicates(pd.concat(dumps, ignore_index=True)) if dumps else []
+    long = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=LONG_COLUMNS)
+    before = len(long)
+    long = long.drop_duplicates(subset=["Verbo"] + KEY_COLUMNS, keep="last").reset_index(drop=True)
+    stats = {
+        "base_rows": 0 if base is None else len(base),
+        "imported_rows": imported,
+        "replaced_rows": before - len(long),
+        "rows": len(long),
+        "verbs": int(long["Verbo"].nunique()),
+    }
+    return long, stats, issues
+
+
+def write_dataset(long: pd.DataFrame, output: str) -> None:
+    """Escribe en el formato de la app: ``.bundle`` o CSV largo."""
+    if output.endswith(".csv"):
+        with atomic_write(output, encoding="utf-8", newline="") as f:
+            long.to_csv(f, index=False)
+    else:
+        write_bundle(long, output)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importa volcados grandes de conjugaciones.")
+    parser.add_argument("inputs", nargs="+", help="CSV o JSONL, anchos o largos")
+    parser.add_argument("-o", "--output", default="conjugazioni.bundle", help=".bundle o .csv (largo)")
+    parser.add_argument("--base", default="conjugazioni.csv", help="dataset al que se suman ('' para ninguno)")
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="procesos de normalización")
+    parser.add_argument("--force", action="store_true", help="escribe aunque la validación tenga errores")
+    args = parser.parse_args(argv)
+
+    t = time.perf_counter()
+    long, stats, issues = import_files(args.inputs, args.base or None, args.chunksize, args.jobs)
+    issues += validate(long)
+    for it in issues:
+        print(f"[{it['level']}] {it['check']}: {it['message']} ({it['count']})", file=sys.stderr)
+    errors = any(it["level"] == "error" for it in issues)
+    if errors and not args.force:
+        print("importación cancelada: hay errores de validación (--force para escribir igual)", file=sys.stderr)
+        return 1
+    write_dataset(long, args.output)
+    print(
+        f"{args.output}: {stats['rows']} formas, {stats['verbs']} verbos "
+        f"({stats['imported_rows']} importadas, {stats['replaced_rows']} reemplazadas) "
+        f"en {time.perf_counter() - t:.2f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
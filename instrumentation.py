@@ -0,0 +1,155 @@
+"""Tiempos de los caminos calientes de la app (spans por rerun).
+
+``TRACER`` es único por proceso. Cada rerun de una sesión con el panel de
+debug activo acumula sus spans en un dict propio del hilo (Streamlit corre
+cada rerun en su hilo) y al terminar los vuelca en ventanas móviles por
+nombre, de donde salen los percentiles. Con el panel apagado ``span`` devuelve
+un context manager vacío compartido y ``timed`` llama directo a la función:
+el costo es una lectura de atributo thread-local.
+
+Exportación: JSONL (un registro por rerun, también a ``INSTRUMENT_LOG`` si
+está definido) y texto de Prometheus (summary con cuantiles por span).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+import numpy as np
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+_NULL = nullcontext()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Tracer:
+    """Spans por rerun + percentiles móviles por nombre de span."""
+
+    def __init__(self, window: int = 500, log_path: str = None):
+        self.window = window
+        self.log_path = log_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._samples: dict = {}
+        self._counts: dict = {}
+        self._sums: dict = {}
+        self._reruns: deque = deque(maxlen=window)
+
+    # ---------------------- medición ----------------------
+    @property
+    def active(self) -> bool:
+        return getattr(self._local, "spans", None) is not None
+
+    def begin_rerun(self, enabled: bool) -> None:
+        """Empieza un rerun; si ``enabled`` es False los spans no cuestan nada."""
+        self._local.spans = {} if enabled else None
+        self._local.start = time.perf_counter()
+
+    def span(self, name: str):
+        """``with TRACER.span("nombre"):`` mide el bloque si el rerun está activo."""
+        if getattr(self._local, "spans", None) is None:
+            return _NULL
+        return _Span(self, name)
+
+    def timed(self, name: str):
+        """Decorador equivalente a envolver la función en ``span(name)``."""
+
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if getattr(self._local, "spans", None) is None:
+                    return fn(*args, **kwargs)
+                with _Span(self, name):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def _add(self, name: str, seconds: float) -> None:
+        spans = self._local.spans
+        if spans is not None:
+            spans[name] = spans.get(name, 0.0) + seconds
+
+    def end_rerun(self):
+        """
+        Cierra el rerun: agrega sus spans a las ventanas y devuelve el registro
+        ``{"ts", "total_s", "spans"}`` (None si el rerun no estaba activo).
+        """
+        spans = getattr(self._local, "spans", None)
+        if spans is None:
+            return None
+        record = {
+            "ts": time.time(),
+            "total_s": time.perf_counter() - self._local.start,
+            "spans": spans,
+        }
+        self._local.spans = None
+        with self._lock:
+            for name, seconds in [("rerun", record["total_s"]), *spans.items()]:
+                self._samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+                self._counts[name] = self._counts.get(name, 0) + 1
+                self._sums[name] = self._sums.get(name, 0.0) + seconds
+            self._reruns.append(record)
+        if self.log_path:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        return record
+
+    # ---------------------- lectura ----------------------
+    def summary(self) -> list:
+        """Percentiles móviles por span (en ms), ordenados por p90 descendente."""
+        with self._lock:
+            windows = {k: np.asarray(v) for k, v in self._samples.items()}
+            counts = dict(self._counts)
+        rows = []
+        for name, samples in windows.items():
+            p50, p90, p99 = np.quantile(samples, QUANTILES) * 1000
+            rows.append(
+                {"span": name, "count": counts[name], "p50_ms": p50, "p90_ms": p90, "p99_ms": p99}
+            )
+        return sorted(rows, key=lambda r: -r["p90_ms"])
+
+    def to_jsonl(self) -> str:
+        """Últimos reruns medidos, uno por línea."""
+        with self._lock:
+            return "".join(json.dumps(r) + "\n" for r in self._reruns)
+
+    def to_prometheus(self, prefix: str = "quiz") -> str:
+        """Summary de Prometheus (formato texto) con cuantiles móviles por span."""
+        metric = f"{prefix}_span_seconds"
+        lines = [
+            f"# HELP {metric} Duración de los spans instrumentados de la app.",
+            f"# TYPE {metric} summary",
+        ]
+        with self._lock:
+            windows = {k: np.asarray(v) for k, v in self._samples.items()}
+            counts, sums = dict(self._counts), dict(self._sums)
+        for name, samples in sorted(windows.items()):
+            for q, value in zip(QUANTILES, np.quantile(samples, QUANTILES)):
+                lines.append(f'{metric}{{span="{name}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {sums[name]:.6f}')
+            lines.append(f'{metric}_count{{span="{name}"}} {counts[name]}')
+        return "\n".join(lines) + "\n"
+
+
+TRACER = Tracer(log_path=os.environ.get("INSTRUMENT_LOG") or None)
@@ -0,0 +1,461 @@
+"""Persistencia del progreso del alumno.
+
+- ``JsonProgressStore``: un único ``progress.json`` reescrito en cada guardado
+  (comportamiento histórico, ahora con escritura atómica).
+- ``JournalProgressStore``: snapshot ``progress.json`` + journal append-only
+  ``progress.jsonl``. Cada guardado agrega solo los eventos nuevos (O(1) por
+  respuesta) y cada ``compact_every`` eventos se compacta en un snapshot.
+- ``SqliteProgressStore``: base SQLite compartida con progreso por usuario;
+  los eventos de cada rerun se escriben juntos en una sola transacción.
+
+Los stores de archivo no se comparten: cada usuario tiene los suyos
+(``progress.<user>.json``, ver ``user_path``).
+
+Todos exponen ``load() -> dict``, ``save(state)`` y ``flush()``. Las tarjetas
+de repetición (``cards``) se guardan como registros; cada cambio de tarjeta es
+un evento propio. En los snapshots el historial va en filas compactas
+(``{"fields", "items"}``); ``load`` lo devuelve como lista de dicts. La
+cola de repetición anterior (``repeat_queue``) solo se lee para migrarla a
+tarjetas y se borra en el siguiente guardado (ver ``repeat_scheduler``).
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from atomic_io import atomic_write
+from card_model import CARD_FIELDS, card_key
+from history import RECORD_FIELDS
+from repeat_scheduler import legacy_repeat_items, replay_repeat_event
+
+# Listas de intentos que solo crecen (o se vacían al reiniciar la sesión)
+HISTORY_KEYS = ["session_corrects", "session_errors"]
+# Cola de repetición anterior a las tarjetas: solo se lee al cargar (migración)
+LEGACY_KEY = "repeat_queue"
+# Claves con seguimiento propio de cambios (no se guardan con "set")
+TRACKED_KEYS = HISTORY_KEYS + ["cards", LEGACY_KEY]
+
+
+def atomic_write_json(path: str, data: dict) -> None:
+    """Escribe JSON de forma atómica (``atomic_io.atomic_write``, con fsync)."""
+    with atomic_write(path, encoding="utf-8", fsync=True) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _read_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _copy(value):
+    return list(value) if isinstance(value, list) else value
+
+
+def _cards_json(cards) -> dict:
+    """Tarjetas como ``{"fields", "items"}`` (desde un CardModel o {clave: registro})."""
+    if hasattr(cards, "to_json"):
+        return cards.to_json()
+    if isinstance(cards, dict) and "fields" in cards:
+        return cards
+    return {"fields": CARD_FIELDS, "items": list((cards or {}).values())}
+
+
+def _cards_by_key(data) -> dict:
+    """{clave: registro} para poder aplicar eventos "card" en O(1)."""
+    items = (data or {}).get("items", [])
+    return {card_key(it): it for it in items}
+
+
+def _attempts_json(items) -> dict:
+    """Historial como filas compactas ``{"fields", "items"}``."""
+    if hasattr(items, "to_json"):
+        return items.to_json()
+    if isinstance(items, dict):
+        return items
+    return {"fields": RECORD_FIELDS, "items": [[it.get(f) for f in RECORD_FIELDS] for it in items]}
+
+
+def _attempts_list(data) -> list:
+    """Lista de dicts desde filas compactas (o la lista de dicts de antes)."""
+    if isinstance(data, dict):
+        fields = data.get("fields", RECORD_FIELDS)
+        return [dict(zip(fields, row)) for row in data.get("items", [])]
+    return list(data or [])
+
+
+def _to_snapshot(state: dict) -> dict:
+    data = dict(state)
+    for key in HISTORY_KEYS:
+        if key in state:
+            data[key] = _attempts_json(state[key])
+    data.pop(LEGACY_KEY, None)
+    if "cards" in state:
+        data["cards"] = _cards_json(state["cards"])
+    return data
+
+
+def _from_snapshot(data: dict) -> dict:
+    state = dict(data)
+    for key in HISTORY_KEYS:
+        if key in data:
+            state[key] = _attempts_list(data[key])
+    state.pop(LEGACY_KEY, None)
+    if data.get(LEGACY_KEY):
+        state[LEGACY_KEY] = legacy_repeat_items(data[LEGACY_KEY])
+    if "cards" in data:
+        state["cards"] = _cards_by_key(data["cards"])
+    return state
+
+
+class JsonProgressStore:
+    """Guarda todo el estado en un único JSON (reescritura completa)."""
+
+    def __init__(self, path: str = "progress.json"):
+        self.path = path
+
+    def load(self) -> dict:
+        data = _read_json(self.path)
+        return _from_snapshot(data) if data else {}
+
+    def save(self, state: dict) -> None:
+        atomic_write_json(self.path, _to_snapshot(state))
+
+    def flush(self) -> None:
+        pass
+
+
+class _ChangeTracker:
+    """Calcula los eventos que cambiaron desde el último estado recordado."""
+
+    def _remember(self, state: dict) -> None:
+        self._lengths = {k: len(state.get(k, [])) for k in HISTORY_KEYS}
+        self._values = {k: _copy(v) for k, v in state.items() if k not in TRACKED_KEYS}
+        # Hay cola antigua que borrar en el próximo guardado
+        self._legacy = bool(state.get(LEGACY_KEY))
+        self._cards = state.get("cards")
+        if hasattr(self._cards, "drain_changes"):
+            self._cards.drain_changes()
+
+    def _diff(self, state: dict) -> list:
+        events = []
+        for key in HISTORY_KEYS:
+            items = state.get(key, [])
+            start = self._lengths.get(key, 0)
+            if len(items) < start:
+                events.append({"op": "clear", "key": key})
+                start = 0
+            events.extend({"op": "append", "key": key, "item": it} for it in items[start:])
+            self._lengths[key] = len(items)
+
+        changed = {
+            k: v
+            for k, v in state.items()
+            if k not in TRACKED_KEYS and self._values.get(k) != v
+        }
+        if changed:
+            events.append({"op": "set", "values": changed})
+            self._values.update({k: _copy(v) for k, v in changed.items()})
+
+        cards = state.get("cards")
+        if cards is not None:
+            if cards is not self._cards:
+                # Modelo nuevo (al cargar o al reiniciar): se guarda entero una vez
+                events.append({"op": "cards_reset", "cards": _cards_json(cards)})
+                if hasattr(cards, "drain_changes"):
+                    cards.drain_changes()
+                self._cards = cards
+            else:
+                events.extend({"op": "card", "item": it} for it in cards.drain_changes())
+        return events
+
+
+class JournalProgressStore(_ChangeTracker):
+    """Snapshot + journal de eventos append-only con compactación periódica."""
+
+    def __init__(
+        self,
+        path: str = "progress.json",
+        journal_path: str = "progress.jsonl",
+        compact_every: int = 500,
+    ):
+        self.path = path
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self._seq = None  # último número de evento escrito
+        self._pending = 0  # eventos en el journal desde el último snapshot
+        self._lengths: dict[str, int] = {}
+        self._values: dict = {}
+        self._legacy = False
+        self._cards = None
+
+    # ---------------------- lectura ----------------------
+    def load(self) -> dict:
+        """Lee el snapshot y reproduce encima los eventos del journal."""
+        snapshot = _read_json(self.path)
+        state = _from_snapshot(snapshot) if snapshot else {}
+        seq = snapshot.get("journal_seq", 0)
+        self._pending = 0
+
+        if os.path.exists(self.journal_path):
+            valid_end = 0
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        ev = json.loads(line.decode("utf-8"))
+                    except ValueError:
+                        break  # línea truncada por un corte: se descarta el resto
+                    valid_end += len(line)
+                    if ev.get("seq", 0) <= seq:
+                        continue  # ya incluido en el snapshot
+                    self._apply(state, ev)
+                    seq = ev["seq"]
+                    self._pending += 1
+            if valid_end < os.path.getsize(self.journal_path):
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(valid_end)
+
+        state.pop("journal_seq", None)
+        self._seq = seq
+        self._remember(state)
+        return state
+
+    @staticmethod
+    def _apply(state: dict, ev: dict) -> None:
+        op = ev.get("op")
+        if op == "append":
+            state.setdefault(ev["key"], []).append(ev["item"])
+        elif op == "clear":
+            state[ev["key"]] = []
+        elif op == "set":
+            state.update(ev["values"])
+        elif op.startswith("repeat_"):
+            replay_repeat_event(state, ev)  # journal anterior a las tarjetas
+        elif op == "card":
+            state.setdefault("cards", {})[card_key(ev["item"])] = ev["item"]
+        elif op == "cards_reset":
+            state["cards"] = _cards_by_key(ev["cards"])
+
+    # ---------------------- escritura ----------------------
+    def save(self, state: dict) -> None:
+        """Agrega al journal solo lo que cambió desde el último guardado."""
+        if self._seq is None:
+            self.load()
+        events = self._diff(state)
+        if not events:
+            if self._legacy:
+                self.compact(state)
+            return
+
+        lines = []
+        for ev in events:
+            self._seq += 1
+            ev["seq"] = self._seq
+            lines.append(json.dumps(ev, ensure_ascii=False, separators=(",", ":")))
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+        self._pending += len(events)
+
+        # La cola antigua solo vive en el snapshot/journal viejos: compactar la borra
+        if self._pending >= self.compact_every or self._legacy:
+            self.compact(state)
+
+    def flush(self) -> None:
+        pass  # cada save() ya queda escrito en el journal
+
+    def compact(self, state: dict) -> None:
+        """Vuelca el estado completo a un snapshot atómico y vacía el journal."""
+        data = _to_snapshot(state)
+        data["journal_seq"] = self._seq or 0
+        atomic_write_json(self.path, data)
+        # Si se corta aquí, los eventos viejos se saltan gracias a journal_seq
+        with atomic_write(self.journal_path, encoding="utf-8"):
+            pass
+        self._pending = 0
+        self._legacy = False
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    user TEXT NOT NULL,
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    verb TEXT, modo TEXT, tiempo TEXT, nombre TEXT, pronombre TEXT,
+    provided TEXT, correct TEXT, is_repeat INTEGER, ts REAL
+);
+CREATE INDEX IF NOT EXISTS attempts_user_kind ON attempts (user, kind, id);
+CREATE TABLE IF NOT EXISTS state (
+    user TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (user, key)
+);
+CREATE TABLE IF NOT EXISTS cards (
+    user TEXT NOT NULL,
+    card TEXT NOT NULL,
+    item TEXT NOT NULL,
+    PRIMARY KEY (user, card)
+);
+"""
+
+# Streamlit ejecuta cada rerun en un hilo nuevo: una conexión por hilo repetiría
+# PRAGMAs y migración en cada rerun. Se abre una por base y por proceso y todo
+# acceso pasa por este lock.
+_connections: dict = {}
+_db_lock = threading.RLock()
+
+
+def _connection(path: str) -> sqlite3.Connection:
+    """La conexión del proceso para ``path`` (esquema migrado una sola vez)."""
+    with _db_lock:
+        conn = _connections.get(path)
+        if conn is None:
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            try:
+                # Bases creadas antes de guardar la hora de cada intento
+                conn.execute("ALTER TABLE attempts ADD COLUMN ts REAL")
+            except sqlite3.OperationalError:
+                pass
+            _connections[path] = conn
+        return conn
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class SqliteProgressStore(_ChangeTracker):
+    """Progreso por usuario en SQLite; ``save`` acumula y ``flush`` escribe."""
+
+    def __init__(self, path: str = "progress.db", user: str = "default"):
+        self.path = path
+        self.user = user
+        self._buffer: list = []
+        self._lengths: dict[str, int] = {}
+        self._values: dict = {}
+        self._legacy = False
+        self._cards = None
+
+    def load(self) -> dict:
+        """Lee solo las filas del usuario actual."""
+        with _db_lock:
+            return self._load(_connection(self.path))
+
+    def _load(self, conn: sqlite3.Connection) -> dict:
+        state: dict = {k: [] for k in HISTORY_KEYS}
+        cols = ", ".join(RECORD_FIELDS)
+        for kind, *values in conn.execute(
+            f"SELECT kind, {cols} FROM attempts WHERE user = ? ORDER BY kind, id", (self.user,)
+        ):
+            item = dict(zip(RECORD_FIELDS, values))
+            item["is_repeat"] = bool(item["is_repeat"])
+            state.setdefault(kind, []).append(item)
+        for key, value in conn.execute("SELECT key, value FROM state WHERE user = ?", (self.user,)):
+            state[key] = json.loads(value)
+        try:
+            # Tabla de la cola anterior a las tarjetas (solo en bases viejas)
+            legacy = [
+                json.loads(item)
+                for (item,) in conn.execute(
+                    "SELECT item FROM repeat_items WHERE user = ? ORDER BY id", (self.user,)
+                )
+            ]
+        except sqlite3.OperationalError:
+            legacy = []
+        if legacy:
+            state[LEGACY_KEY] = legacy
+        cards = [
+            json.loads(item)
+            for (item,) in conn.execute("SELECT item FROM cards WHERE user = ?", (self.user,))
+        ]
+        if cards:
+            state["cards"] = {card_key(it): it for it in cards}
+        self._buffer = []
+        self._remember(state)
+        return state
+
+    def save(self, state: dict) -> None:
+        """Acumula los cambios; se escriben en el próximo ``flush()``."""
+        self._buffer.extend(self._diff(state))
+
+    def flush(self) -> None:
+        """Escribe los eventos acumulados en una única transacción."""
+        if not self._buffer:
+            return
+        events, self._buffer = self._buffer, []
+        # La cola antigua se borra en la misma transacción que guarda las tarjetas
+        migrated = self._legacy and any(ev["op"] == "cards_reset" for ev in events)
+        with _db_lock, _connection(self.path) as conn:
+            for ev in events:
+                self._write(conn, ev)
+            if migrated:
+                conn.execute("DELETE FROM repeat_items WHERE user = ?", (self.user,))
+                if conn.execute("SELECT 1 FROM repeat_items LIMIT 1").fetchone() is None:
+                    conn.execute("DROP TABLE repeat_items")
+        if migrated:
+            self._legacy = False
+
+    def _write(self, conn: sqlite3.Connection, ev: dict) -> None:
+        op, user = ev["op"], self.user
+        if op == "append":
+            item = ev["item"]
+            conn.execute(
+                f"INSERT INTO attempts (user, kind, {', '.join(RECORD_FIELDS)}) "
+                f"VALUES (?, ?, {', '.join('?' for _ in RECORD_FIELDS)})",
+                (user, ev["key"], *(item.get(f) for f in RECORD_FIELDS)),
+            )
+        elif op == "clear":
+            conn.execute("DELETE FROM attempts WHERE user = ? AND kind = ?", (user, ev["key"]))
+        elif op == "set":
+            conn.executemany(
+                "INSERT OR REPLACE INTO state (user, key, value) VALUES (?, ?, ?)",
+                [(user, k, _dumps(v)) for k, v in ev["values"].items()],
+            )
+        elif op == "card":
+            conn.execute(
+                "INSERT OR REPLACE INTO cards (user, card, item) VALUES (?, ?, ?)",
+                (user, _dumps(card_key(ev["item"])), _dumps(ev["item"])),
+            )
+        elif op == "cards_reset":
+            conn.execute("DELETE FROM cards WHERE user = ?", (user,))
+            conn.executemany(
+                "INSERT INTO cards (user, card, item) VALUES (?, ?, ?)",
+                [(user, _dumps(card_key(it)), _dumps(it)) for it in ev["cards"]["items"]],
+            )
+
+
+def user_path(path: str, user: str = "default") -> str:
+    """
+    Ruta de archivo propia de ``user``: ``progress.json`` -> ``progress.<user>.json``.
+    Dos sesiones sobre el mismo journal chocarían en ``seq`` y la compactación
+    de una borraría los eventos de la otra. ``default`` conserva la ruta tal cual.
+    """
+    if user == "default":
+        return path
+    if not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", user):
+        user = hashlib.sha1(user.encode("utf-8")).hexdigest()[:16]
+    root, ext = os.path.splitext(path)
+    return f"{root}.{user}{ext}"
+
+
+def make_progress_store(kind: str = "journal", path: str = None, user: str = "default"):
+    """
+    Crea el store de progreso según ``kind`` ("json", "journal" o "sqlite").
+    Los stores de archivo usan un archivo por ``user`` (``user_path``);
+    SQLite comparte la base y separa las filas por ``user``.
+    """
+    if kind == "json":
+        return JsonProgressStore(user_path(path or "progress.json", user))
+    if kind == "journal":
+        path = user_path(path or "progress.json", user)
+        return JournalProgressStore(path, os.path.splitext(path)[0] + ".jsonl")
+    if kind == "sqlite":
+        return SqliteProgressStore(path or "progress.db", user)
+    raise ValueError(f"Tipo de store de progreso desconocido: {kind}")
@@ -0,0 +1,317 @@
+"""API HTTP/JSON del quiz sobre asyncio (solo biblioteca estándar).
+
+Usa el mismo motor que la app (``quiz_engine``): una ``ConjugationTable``
+compartida por todo el proceso y una ``QuizSession`` en memoria por sesión,
+con las mismas tarjetas SM-2 y el mismo prefetch. Las sesiones sin actividad
+durante ``ttl`` segundos se descartan (las más viejas primero, en O(1) por
+sesión gracias al orden de acceso del ``OrderedDict``).
+
+    python quiz_api.py --port 8765 --ttl 1800
+
+Endpoints (JSON de entrada y salida):
+
+- ``POST /sessions`` → ``{"session"}``; cuerpo opcional con filtros
+  ``verbs``, ``modes``, ``tiempos``, ``nombre``, ``genere``.
+- ``POST /sessions/<id>/next`` → siguiente pregunta (sin la forma correcta).
+- ``POST /sessions/<id>/answer`` con ``{"answer"}`` → corrección.
+- ``GET /sessions/<id>/progress`` → contadores de la sesión.
+- ``DELETE /sessions/<id>``
+- ``GET /lookup?verb=...&modo=...&tiempo=...&nombre=...&genere=...&pronombre=...``
+  → formas del verbo (los filtros de modo/tempo/pronome se repiten o van
+  separados por comas).
+- ``GET /options?verb=...&modo=...&tiempo=...&nombre=...&genere=...`` → valores
+  de cada filtro que todavía tienen preguntas (para desactivar el resto).
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from quiz_engine import ConjugationTable, QuizSession, shared_table
+from quiz_index import FILTER_ARGS
+
+# Campos de la pregunta que se envían al cliente (nunca la respuesta)
+QUESTION_FIELDS = ["tiempo", "nombre", "modo", "pronombre", "verb", "genere", "is_repeat"]
+MAX_BODY = 64 * 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================================
+#                 SESIONES EN MEMORIA CON TTL
+# ============================================================
+class SessionPool:
+    """``QuizSession`` por id, ordenadas por último acceso y con expiración."""
+
+    def __init__(self, table: ConjugationTable, ttl: float = 1800, max_sessions: int = 100_000):
+        self.table = table
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict = OrderedDict()  # id -> [QuizSession, último acceso]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, filters: dict = None) -> str:
+        self.evict()
+        if len(self._sessions) >= self.max_sessions:
+            self._sessions.popitem(last=False)
+        session = QuizSession(self.table)
+        for key, value in (filters or {}).items():
+            if key in ("verbs", "modes", "tiempos") and isinstance(value, list):
+                known = getattr(self.table, key)
+                setattr(session, f"selected_{key}", [v for v in value if isinstance(v, str) and v in known])
+            elif key in ("nombre", "genere"):
+                if not isinstance(value, str):
+                    raise ApiError(HTTPStatus.BAD_REQUEST, f"'{key}' deve essere una stringa")
+                setattr(session, f"selected_{key}", value)
+        index = self.table.index
+        if not (index.candidate_mask(**session.filters()) & index.live_rows(session.selected_verbs)).any():
+            raise ApiError(HTTPStatus.BAD_REQUEST, "nessuna domanda con questi filtri")
+        sid = uuid.uuid4().hex
+        self._sessions[sid] = [session, time.monotonic()]
+        return sid
+
+    def get(self, sid: str) -> QuizSession:
+        entry = self._sessions.get(sid)
+        now = time.monotonic()
+        if entry is None or now - entry[1] > self.ttl:
+            self._sessions.pop(sid, None)
+            raise ApiError(HTTPStatus.NOT_FOUND, "sessione inesistente o scaduta")
+        entry[1] = now
+        self._sessions.move_to_end(sid)
+        return entry[0]
+
+    def drop(self, sid: str) -> None:
+        self._sessions.pop(sid, None)
+
+    def evict(self) -> int:
+        """Descarta las sesiones vencidas; solo mira las más viejas."""
+        limit = time.monotonic() - self.ttl
+        dropped = 0
+        while self._sessions:
+            sid, (_, last) = next(iter(self._sessions.items()))
+            if last > limit:
+                break
+            del self._sessions[sid]
+            dropped += 1
+        return dropped
+
+
+# ============================================================
+#                     ENDPOINTS
+# ============================================================
+def _public(question: dict) -> dict:
+    return {k: question[k] for k in QUESTION_FIELDS}
+
+
+def _progress(session: QuizSession) -> dict:
+    return {
+        "score": session.score,
+        "questions": session.questions,
+        "accuracy": round(session.accuracy, 2),
+        "repeats": session.repeats,
+        "due": session.cards.due_count(session.questions),
+        "corrects": len(session.session_corrects),
+        "errors": len(session.session_errors),
+        "all_done": session.all_done,
+    }
+
+
+def _listed(query: dict, key: str):
+    values = [v for item in query.get(key, []) for v in item.split(",") if v]
+    return values or None
+
+
+def lookup(table: ConjugationTable, query: dict) -> dict:
+    """Formas de un verbo filtradas, leídas directo del índice (sin DataFrames)."""
+    verb = (query.get("verb") or [""])[0]
+    index = table.index
+    if not index.has_verb(verb):
+        raise ApiError(HTTPStatus.NOT_FOUND, f"verbo sconosciuto: {verb!r}")
+    rows = index.candidates(
+        modes=_listed(query, "modo"),
+        tiempos=_listed(query, "tiempo"),
+        nombre=(query.get("nombre") or [None])[0],
+        genere=(query.get("genere") or [None])[0],
+        pronouns=_listed(query, "pronombre"),
+    )
+    forms = []
+    for row_id in rows:
+        form = index.form(row_id, verb)
+        if form is None:
+            continue
+        r = index.record(row_id)
+        forms.append(
+            {
+                "modo": r["Modo"],
+                "tiempo": r["Tiempo"],
+                "nombre": r["Nombre"],
+                "pronombre": r["Pronombre"],
+                "genere": r["Genere"],
+                "forma": form,
+            }
+        )
+    return {"verb": verb, "forms": forms}
+
+
+def options(table: ConjugationTable, query: dict) -> dict:
+    """Valores con preguntas de cada filtro, dados los demás (``QuestionIndex.options``)."""
+    filters = {
+        "modes": _listed(query, "modo"),
+        "tiempos": _listed(query, "tiempo"),
+        "nombre": (query.get("nombre") or [None])[0],
+        "genere": (query.get("genere") or [None])[0],
+    }
+    verbs = _listed(query, "verb")
+    return {col: list(table.index.options(col, verbs=verbs, **filters)) for col in FILTER_ARGS}
+
+
+def route(pool: SessionPool, method: str, path: str, query: dict, body: dict):
+    """Despacha una petición; devuelve ``(status, payload)`` o lanza ``ApiError``."""
+    parts = [p for p in path.split("/") if p]
+    if parts == ["lookup"] and method == "GET":
+        return HTTPStatus.OK, lookup(pool.table, query)
+    if parts == ["options"] and method == "GET":
+        return HTTPStatus.OK, options(pool.table, query)
+    if parts == ["sessions"] and method == "POST":
+        return HTTPStatus.CREATED, {"session": pool.create(body)}
+    if len(parts) >= 2 and parts[0] == "sessions":
+        sid, action = parts[1], parts[2] if len(parts) == 3 else None
+        if action is None and method == "DELETE":
+            pool.drop(sid)
+            return HTTPStatus.OK, {"session": sid}
+        session = pool.get(sid)
+        if action == "next" and method == "POST":
+            question = session.next_question()
+            return HTTPStatus.OK, {
+                "question": _public(question) if question else None,
+                "all_done": session.all_done,
+            }
+        if action == "answer" and method == "POST":
+            if session.question is None:
+                raise ApiError(HTTPStatus.CONFLICT, "nessuna domanda in sospeso")
+            answer = body.get("answer")
+            if not isinstance(answer, str) or not answer.strip():
+                raise ApiError(HTTPStatus.BAD_REQUEST, "manca 'answer'")
+            is_correct, attempt = session.submit(answer)
+            # Una pregunta se contesta una sola vez
+            session.question = None
+            return HTTPStatus.OK, {"correct": is_correct, "expected": attempt["correct"], "progress": _progress(session)}
+        if action == "progress" and method == "GET":
+            return HTTPStatus.OK, _progress(session)
+    raise ApiError(HTTPStatus.NOT_FOUND, f"{method} {path}")
+
+
+# ============================================================
+#                     SERVIDOR HTTP/1.1
+# ============================================================
+def _response(status: HTTPStatus, payload, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def handle(pool: SessionPool, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Atiende una conexión (con keep-alive) hasta que el cliente la cierra."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            method, target, version = request_line.decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+            try:
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    raise ApiError(HTTPStatus.BAD_REQUEST, "Content-Length non valido")
+                if length > MAX_BODY:
+                    raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "corpo troppo grande")
+                raw = await reader.readexactly(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    raise ApiError(HTTPStatus.BAD_REQUEST, "JSON non valido")
+                if not isinstance(body, dict):
+                    raise ApiError(HTTPStatus.BAD_REQUEST, "il corpo deve essere un oggetto JSON")
+                url = urlsplit(target)
+                status, payload = route(pool, method.upper(), url.path, parse_qs(url.query), body)
+            except ApiError as e:
+                status, payload = e.status, {"error": str(e)}
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                # Un fallo inesperado no debe cortar la conexión sin respuesta
+                print(f"error interno en {method} {target}: {e!r}", file=sys.stderr)
+                status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "errore interno"}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _evict_loop(pool: SessionPool, every: float) -> None:
+    while True:
+        await asyncio.sleep(every)
+        pool.evict()
+
+
+async def serve(table: ConjugationTable, host: str, port: int, ttl: float, max_sessions: int) -> None:
+    pool = SessionPool(table, ttl=ttl, max_sessions=max_sessions)
+    server = await asyncio.start_server(lambda r, w: handle(pool, r, w), host, port)
+    evictor = asyncio.create_task(_evict_loop(pool, min(ttl, 60)))
+    print(f"API del quiz en http://{host}:{port} ({len(table.verbs)} verbos)", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        evictor.cancel()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="API HTTP/JSON del quiz de conjugaciones.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data", default="conjugazioni.csv")
+    parser.add_argument("--verbs-file", default="verbi.txt", help="infinitivos extra conjugados por reglas")
+    parser.add_argument("--ttl", type=float, default=1800, help="segundos de inactividad antes de descartar una sesión")
+    parser.add_argument("--max-sessions", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    table = shared_table(args.data, args.verbs_file)
+    try:
+        asyncio.run(serve(table, args.host, args.port, args.ttl, args.max_sessions))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
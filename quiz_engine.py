@@ -0,0 +1,363 @@
+"""Motor del quiz sin Streamlit: tabla de conjugaciones + sesión de un alumno.
+
+``ConjugationTable`` es la parte compartida e inmutable (dataset limpio,
+índice de preguntas, corrector de respuestas y opciones de los filtros): se
+construye una vez por proceso. ``QuizSession`` es el estado de un alumno
+(filtros, contadores, historial, tarjetas SM-2, prefetch) con operaciones que
+reciben y devuelven datos planos: ``next_question``, ``submit``, ``reset``,
+``to_state``/``load_state``. ``app.py`` es solo un adaptador de UI encima;
+el mismo motor sirve para benchmarks, workers u otros frontends.
+"""
+import os
+import random
+import threading
+
+import pandas as pd
+
+from card_model import CardModel
+from conjugation_data import load_conjugations
+from conjugator import Conjugator, can_conjugate, reference_from
+from grading import AnswerChecker, grade_answer
+from history import AttemptLog, PerformanceStats, attempt_pools
+from instrumentation import TRACER
+from quiz_index import QuestionIndex
+
+PRON_ORDER = ["Io", "Tu", "Lui", "Lei", "Noi", "Voi", "Loro"]
+
+# Preguntas aleatorias sorteadas por adelantado en cada lote
+PREFETCH_SIZE = 16
+# Preguntas recientes que no se vuelven a sortear
+RECENT_SIZE = 50
+
+
+def clean_conjugations(df: pd.DataFrame) -> pd.DataFrame:
+    """Quita el femenino y el pronombre Lei y ordena los pronombres."""
+    df = df[(df["Genere"] != "F") & (df["Pronombre"] != "Lei")].copy()
+    df["Pronombre"] = pd.Categorical(df["Pronombre"], categories=PRON_ORDER, ordered=True)
+    return df
+
+
+def load_extra_verbs(path: str = "verbi.txt") -> tuple:
+    """Infinitivos extra (uno por línea) que se conjugan por reglas, si existe el archivo."""
+    if not os.path.exists(path):
+        return ()
+    with open(path, encoding="utf-8") as f:
+        verbs = (line.strip().lower() for line in f)
+        return tuple(v for v in verbs if v and not v.startswith("#") and can_conjugate(v))
+
+
+# ============================================================
+#                 TABLA COMPARTIDA (POR PROCESO)
+# ============================================================
+class ConjugationTable:
+    """
+    Índice de preguntas + corrector + opciones de los filtros, de solo lectura:
+    los arrays del índice no son escribibles y las opciones son tuplas, así
+    que una misma instancia se comparte entre todas las sesiones e hilos. Lo
+    único que crece son los ``pools`` de strings interned de los historiales.
+    """
+
+    __slots__ = ("index", "checker", "verbs", "modes", "tiempos", "nombres", "pronouns", "pools")
+
+    def __init__(self, df: pd.DataFrame, extra_verbs=()):
+        """
+        ``df`` es la tabla larga de ``load_conjugations`` (sin limpiar). La
+        tabla limpia solo se usa para construir el índice; no se guarda.
+        """
+        clean = clean_conjugations(df)
+        conjugator = Conjugator(reference_from(clean))
+        self.index = QuestionIndex(clean, extra_verbs=extra_verbs, conjugator=conjugator)
+        # Normaliza una sola vez todas las formas correctas del dataset; las
+        # que trae el bundle ({forma: normalizada}) no se recalculan
+        known = df.attrs.get("form_keys")
+        known = known.value if isinstance(getattr(known, "value", None), dict) else None
+        self.checker = AnswerChecker(self.index.form_pool, known)
+
+        # Opciones de los filtros: vocabularios ya ordenados del índice
+        self.verbs: tuple = tuple(self.index.verbs)
+        self.modes: tuple = tuple(self.index.vocab["Modo"])
+        self.tiempos: tuple = tuple(self.index.vocab["Tiempo"])
+        self.nombres: tuple = tuple(self.index.vocab["Nombre"])
+        self.pronouns: tuple = tuple(p for p in PRON_ORDER if p in self.index.vocab["Pronombre"])
+        # Strings interned de los historiales de todas las sesiones (AttemptLog)
+        self.pools = attempt_pools(
+            self.verbs, self.modes, self.tiempos, self.nombres, self.pronouns, self.index.form_pool
+        )
+
+    @classmethod
+    def load(cls, path: str = "conjugazioni.csv", verbs_path: str = "verbi.txt") -> "ConjugationTable":
+        return cls(load_conjugations(path), load_extra_verbs(verbs_path))
+
+    def question(self, row_id: int, verb: str, is_repeat: bool = False) -> dict:
+        """Pregunta (dict plano) para la fila ``row_id`` del índice y ``verb``."""
+        r = self.index.record(row_id)
+        return {
+            "tiempo": r["Tiempo"],
+            "nombre": r["Nombre"],
+            "modo": r["Modo"],
+            "pronombre": r["Pronombre"],
+            "verb": verb,
+            "correct": self.index.form(row_id, verb),
+            "genere": r["Genere"],
+            "is_repeat": is_repeat,
+        }
+
+
+_tables: dict = {}
+_tables_lock = threading.Lock()
+
+
+def shared_table(path: str = "conjugazioni.csv", verbs_path: str = "verbi.txt") -> ConjugationTable:
+    """
+    ``ConjugationTable`` única por proceso para ``(path, verbs_path)``: la
+    primera llamada la construye (una sola vez aunque lleguen varios hilos a
+    la vez) y las demás devuelven la misma instancia, sin copias. Los workers
+    creados con ``fork`` después de cargarla heredan las mismas páginas.
+    """
+    key = (os.path.abspath(path), os.path.abspath(verbs_path))
+    table = _tables.get(key)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(key)
+            if table is None:
+                table = _tables[key] = ConjugationTable.load(path, verbs_path)
+    return table
+
+
+# ============================================================
+#                 SESIÓN DE UN ALUMNO
+# ============================================================
+# Claves que se guardan en el store de progreso (ver progress_store)
+FILTER_KEYS = ["selected_verbs", "selected_modes", "selected_tiempos", "selected_nombre", "selected_genere"]
+# Filtros de selección múltiple -> vocabulario de la tabla con sus valores válidos
+LIST_FILTERS = {"selected_verbs": "verbs", "selected_modes": "modes", "selected_tiempos": "tiempos"}
+# ``all_done`` no se guarda: depende de los filtros y se recalcula al pedir pregunta
+STATE_KEYS = ["score", "questions", "session_corrects", "session_errors"] + FILTER_KEYS
+
+
+class QuizSession:
+    """Estado y operaciones del quiz de un alumno sobre una ``ConjugationTable``."""
+
+    __slots__ = (
+        "table",
+        "store",
+        "rng",
+        "score",
+        "questions",
+        "session_corrects",
+        "session_errors",
+        "cards",
+        "performance",
+        "last_questions",
+        "prefetch",
+        "question",
+        "all_done",
+        "selected_verbs",
+        "selected_modes",
+        "selected_tiempos",
+        "selected_nombre",
+        "selected_genere",
+    )
+
+    def __init__(self, table: ConjugationTable, store=None, rng=random):
+        """``store`` (opcional) es un store de ``progress_store``; ``rng`` el azar."""
+        self.table = table
+        self.store = store
+        self.rng = rng
+        self.selected_verbs: list = rng.sample(table.verbs, k=len(table.verbs))
+        self.selected_modes: list = list(table.modes)
+        self.selected_tiempos: list = list(table.tiempos)
+        self.selected_nombre = "Tutti"
+        self.selected_genere = "Ambos"
+        self.reset()
+
+    def reset(self) -> None:
+        """Vuelve a cero contadores, historial y tarjetas (los filtros se mantienen)."""
+        self.score = 0
+        self.questions = 0
+        self.session_corrects = AttemptLog(self.table.pools)
+        self.session_errors = AttemptLog(self.table.pools)
+        self.cards = CardModel(self.table.index)
+        self.performance = PerformanceStats()
+        self.last_questions: list = []
+        self.prefetch = None
+        self.question = None
+        self.all_done = False
+
+    # ---------------------- lectura ----------------------
+    @property
+    def accuracy(self) -> float:
+        """Porcentaje de respuestas correctas de la sesión."""
+        return self.score / self.questions * 100 if self.questions > 0 else 0
+
+    @property
+    def repeats(self) -> int:
+        """Tarjetas falladas pendientes de repetir."""
+        return self.cards.learning_count()
+
+    def filters(self) -> dict:
+        """Traduce los filtros elegidos a argumentos del índice de preguntas."""
+        return {
+            "modes": self.selected_modes,
+            "tiempos": self.selected_tiempos,
+            "nombre": self.selected_nombre if self.selected_nombre != "Tutti" else None,
+            "genere": self.selected_genere if self.selected_genere != "Ambos" else None,
+        }
+
+    # ---------------------- preguntas ----------------------
+    def _remember(self, question: dict) -> None:
+        self.last_questions.append(
+            (question["tiempo"], question["nombre"], question["modo"], question["pronombre"], question["verb"])
+        )
+        if len(self.last_questions) > RECENT_SIZE:
+            self.last_questions = self.last_questions[-RECENT_SIZE:]
+
+    def _next_prefetched(self, candidates, filters: dict):
+        """
+        Siguiente par (fila, verbo) del buffer de la sesión. El buffer se llena con
+        un único sorteo de ``PREFETCH_SIZE`` pares distintos y se descarta cuando
+        cambian los filtros o los verbos elegidos.
+        """
+        index = self.table.index
+        selected_verbs = self.selected_verbs or self.table.verbs
+        sig = (index.signature(**filters), tuple(selected_verbs))
+        recent = set(self.last_questions)
+        buffer = self.prefetch
+        if buffer is None or buffer["sig"] != sig:
+            buffer = self.prefetch = {"sig": sig, "items": []}
+
+        for refill in (False, True):
+            if refill:
+                # Un solo sorteo uniforme sobre (fila, verbo) excluyendo las últimas preguntas
+                buffer["items"] = index.sample_many(
+                    candidates, selected_verbs, PREFETCH_SIZE, exclude=recent, rng=self.rng
+                )
+                buffer["items"].reverse()
+            while buffer["items"]:
+                row_id, verb = buffer["items"].pop()
+                r = index.record(row_id)
+                # Las repeticiones servidas después del sorteo también cuentan como recientes
+                if (r["Tiempo"], r["Nombre"], r["Modo"], r["Pronombre"], verb) not in recent:
+                    return row_id, verb
+        return None
+
+    @TRACER.timed("new_question")
+    def next_question(self):
+        """
+        Genera una nueva pregunta según los filtros actuales y la devuelve
+        (None si no hay ninguna).
+        - Respeta filtros (modo, tempo, nome, genere)
+        - Prioriza las tarjetas vencidas del modelo de repetición
+        - Si no hay, toma la siguiente del buffer de prefetch
+        - Evita repeticiones inmediatas, pero permite re-practicar combinaciones ya vistas
+        """
+        index = self.table.index
+        filters = self.filters()
+        candidates = index.candidates(**filters)
+
+        if len(candidates) == 0:
+            self.question = None
+            return None
+
+        # ---------- 1) Priorizar tarjetas vencidas (repetición espaciada) ----------
+        # Las tarjetas ya vistas vuelven según su intervalo, aunque se hayan
+        # contestado bien antes; esto permite re-practicar verbos/tiempos.
+        card = (
+            self.cards.next_due(self.questions, index.candidate_mask(**filters), self.selected_verbs or None)
+            if self.cards
+            else None
+        )
+        if card is not None:
+            # Si se salta sin responder, vuelve a aparecer unas preguntas después
+            self.cards.postpone(card, self.questions)
+            self.save()
+            self.question = self.table.question(*self.cards.split(card), is_repeat=True)
+            self.all_done = False
+            self._remember(self.question)
+            return self.question
+
+        # ---------- 2) Pregunta aleatoria normal (desde el prefetch) ----------
+        chosen = self._next_prefetched(candidates, filters)
+        if not chosen:
+            self.question = None
+            self.all_done = True
+            return None
+
+        self.question = self.table.question(*chosen)
+        self.all_done = False
+        self._remember(self.question)
+        return self.question
+
+    def submit(self, provided: str) -> tuple:
+        """
+        Corrige ``provided`` contra la pregunta actual, actualiza contadores,
+        tarjeta e historial y guarda. Devuelve ``(es_correcta, intento)``.
+        """
+        question = dict(self.question)
+        self.questions += 1
+        is_correct, attempt = grade_answer(question, provided, self.table.checker)
+        self.performance.record(attempt, is_correct)
+        card = self.cards.find(question)
+        if card >= 0:
+            self.cards.review(card, is_correct, self.questions)
+        if is_correct:
+            self.score += 1
+            self.session_corrects.append(attempt)
+        else:
+            self.session_errors.append(attempt)
+        self.save()
+        return is_correct, attempt
+
+    # ---------------------- persistencia ----------------------
+    def to_state(self) -> dict:
+        """Lo que se le pasa al store de progreso."""
+        data = {k: getattr(self, k) for k in STATE_KEYS}
+        data["cards"] = self.cards
+        return data
+
+    def load_state(self, data: dict) -> None:
+        """Aplica un estado leído del store (con migración de formatos anteriores)."""
+        for k in STATE_KEYS:
+            if k in data and k not in LIST_FILTERS:
+                setattr(self, k, data[k])
+        # Los vocabularios salen del dataset: lo guardado que ya no existe se descarta
+        for k, vocab in LIST_FILTERS.items():
+            saved = data.get(k)
+            if isinstance(saved, list):
+                known = set(getattr(self.table, vocab))
+                setattr(self, k, [v for v in saved if v in known])
+        self.session_corrects = AttemptLog.from_json(self.session_corrects, self.table.pools)
+        self.session_errors = AttemptLog.from_json(self.session_errors, self.table.pools)
+        # Los contadores no se guardan (serían un "set" creciente por respuesta):
+        # se recalculan una vez desde el historial, que es la fuente de verdad
+        self.performance = PerformanceStats.from_history(self.session_corrects, self.session_errors)
+        self.cards = CardModel.from_json(self.table.index, data.get("cards"))
+        # Cola de repetición de versiones anteriores (intervalo fijo): pasa al modelo
+        legacy_queue = data.get("repeat_queue")
+        if legacy_queue:
+            self.cards.absorb_repeat_queue(legacy_queue)
+
+    @TRACER.timed("load_progress")
+    def load(self) -> None:
+        """Carga el progreso guardado (snapshot + journal), si existe."""
+        if self.store is None:
+            return
+        try:
+            self.load_state(self.store.load())
+        except Exception:
+            pass
+
+    @TRACER.timed("save_progress")
+    def save(self) -> None:
+        """Guarda el progreso; en modo journal solo agrega los eventos nuevos."""
+        if self.store is None:
+            return
+        try:
+            self.store.save(self.to_state())
+        except Exception:
+            pass
+
+    def flush(self) -> None:
+        """Escribe en un solo lote los cambios pendientes del store."""
+        if self.store is not None:
+            self.store.flush()
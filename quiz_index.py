@@ -0,0 +1,397 @@
+"""Índice precalculado de preguntas sobre la tabla de conjugaciones.
+
+Se construye una sola vez cuando se cargan los datos y es de solo lectura:
+cada dimensión (Modo, Tiempo, Nombre, Pronombre, Genere) queda codificada
+como enteros y cada combinación de filtros se resuelve a un array de ids de
+fila que se guarda en una caché acotada. Las tablas filtradas de un verbo
+(Ripasso) se guardan en otra caché LRU por firma de filtros.
+
+Las filas quedan ordenadas por (Modo, Tiempo, Nombre, Pronombre, Genere)
+según sus códigos; las columnas categóricas ordenadas (p. ej. los pronombres
+Io, Tu, Lui...) conservan su orden. Así las tablas de un verbo salen ya
+ordenadas y filtrarlas es solo una máscara, sin ``sort_values``.
+"""
+import random
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+INDEX_COLUMNS = ["Modo", "Tiempo", "Nombre", "Pronombre", "Genere"]
+# Columna -> argumento de filtro de ``candidates``
+FILTER_ARGS = {
+    "Modo": "modes",
+    "Tiempo": "tiempos",
+    "Nombre": "nombre",
+    "Genere": "genere",
+    "Pronombre": "pronouns",
+}
+
+
+def _readonly(arr: np.ndarray) -> np.ndarray:
+    arr.setflags(write=False)
+    return arr
+
+
+class _LRU:
+    """Caché acotada y segura entre hilos (las sesiones comparten el índice)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+            return hit
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class QuestionIndex:
+    """Índice inmutable (Modo, Tiempo, Nombre, Pronombre, Genere) -> filas."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        extra_verbs=(),
+        conjugator=None,
+        max_cached: int = 256,
+        max_views: int = 128,
+    ):
+        """
+        ``df`` en formato largo: Verbo, Modo, Tiempo, Nombre, Pronombre, Genere,
+        Forma. Los ``extra_verbs`` que no están en ``df`` se conjugan bajo
+        demanda con ``conjugator`` (ver conjugator.Conjugator).
+        """
+        # Códigos por dimensión sobre la tabla larga
+        long_codes = []
+        self.vocab: dict[str, tuple] = {}
+        self._lookup: dict[str, dict] = {}
+        for col in INDEX_COLUMNS:
+            codes, vocab = _ordered_codes(df[col])
+            long_codes.append(codes)
+            self.vocab[col] = tuple(vocab)
+            self._lookup[col] = {v: i for i, v in enumerate(vocab)}
+
+        # Una fila por combinación distinta de las cinco dimensiones: las cinco
+        # columnas se mezclan en una clave int64 (mismo orden lexicográfico,
+        # con +1 para el -1 de los nulos) y se deshace con divmod
+        radix = [len(self.vocab[col]) + 1 for col in INDEX_COLUMNS]
+        combined = np.zeros(len(df), dtype=np.int64)
+        for codes, base in zip(long_codes, radix):
+            combined = combined * base + (np.asarray(codes, dtype=np.int64) + 1)
+        unique, row_of = np.unique(combined, return_inverse=True)
+        keys = np.empty((len(unique), len(radix)), dtype=np.int64)
+        for j in reversed(range(len(radix))):
+            unique, digit = np.divmod(unique, radix[j])
+            keys[:, j] = digit - 1
+        row_of = row_of.ravel()
+        self.size = len(keys)
+        self.codes: dict[str, np.ndarray] = {
+            col: _readonly(keys[:, j].astype(np.int32)) for j, col in enumerate(INDEX_COLUMNS)
+        }
+        self._keys = {
+            tuple(int(k) for k in key): _readonly(np.asarray([row_id], dtype=np.int32))
+            for row_id, key in enumerate(keys)
+        }
+
+        # Matriz filas × verbos con códigos de forma (-1 = forma inexistente)
+        verb_codes, verbs = _appearance_codes(df["Verbo"])
+        form_codes, form_pool = _appearance_codes(df["Forma"])
+        self.conjugator = conjugator
+        generated = [v for v in dict.fromkeys(extra_verbs) if v not in set(verbs)]
+        if conjugator is None:
+            generated = []
+        self.verbs: tuple = tuple(verbs) + tuple(generated)
+        # verbo -> columna en ``forms`` (compartido: las tarjetas de cada sesión lo usan)
+        self.verb_pos = {v: i for i, v in enumerate(self.verbs)}
+        self._generated = frozenset(generated)
+        self.form_pool: tuple = tuple(form_pool)
+        forms = np.full((self.size, len(self.verbs)), -1, dtype=np.int32)
+        forms[row_of, verb_codes] = form_codes
+        self.forms = _readonly(forms)
+
+        # Pares (fila, verbo) sin forma: faltan en el CSV o no hay regla
+        missing = forms < 0
+        if generated:
+            tenses = (self.record(r) for r in range(self.size))
+            supported = np.asarray(
+                [conjugator.supports(t["Modo"], t["Tiempo"], t["Nombre"]) for t in tenses],
+                dtype=bool,
+            )
+            missing[:, len(verbs):] = ~supported[:, None]
+        self.missing = _readonly(missing)
+        self.complete = not bool(missing.any())
+        # Filas con al menos una forma: las demás no generan preguntas
+        self.live = _readonly(~missing.all(axis=1))
+
+        self._cache = _LRU(max_cached)
+        self._views = _LRU(max_views)
+
+    # ---------------------- códigos ----------------------
+    def code(self, col: str, value) -> int:
+        """Devuelve el código entero de un valor (-1 si no existe)."""
+        return self._lookup[col].get(str(value), -1)
+
+    def find(self, modo, tiempo, nombre, pronombre, genere="M") -> np.ndarray:
+        """
+        Ids de fila para una combinación exacta (array vacío si no existe).
+        Con ``genere=None`` devuelve las filas de cualquier género.
+        """
+        if genere is None:
+            found = [self.find(modo, tiempo, nombre, pronombre, g) for g in self.vocab["Genere"]]
+            return np.sort(np.concatenate(found)) if found else _EMPTY
+        key = (
+            self.code("Modo", modo),
+            self.code("Tiempo", tiempo),
+            self.code("Nombre", nombre),
+            self.code("Pronombre", pronombre),
+            self.code("Genere", genere),
+        )
+        return self._keys.get(key, _EMPTY)
+
+    # ---------------------- filtros ----------------------
+    @staticmethod
+    def signature(modes=None, tiempos=None, nombre=None, genere=None, pronouns=None) -> tuple:
+        """Firma hashable de una combinación de filtros."""
+        return (
+            frozenset(modes or ()),
+            frozenset(tiempos or ()),
+            nombre or None,
+            genere or None,
+            frozenset(pronouns or ()),
+        )
+
+    def _resolve(self, sig: tuple) -> tuple:
+        hit = self._cache.get(sig)
+        if hit is not None:
+            return hit
+
+        modes, tiempos, nombre, genere, pronouns = sig
+        mask = np.ones(self.size, dtype=bool)
+        if modes:
+            mask &= self._isin("Modo", modes)
+        if tiempos:
+            mask &= self._isin("Tiempo", tiempos)
+        if nombre is not None:
+            mask &= self.codes["Nombre"] == self.code("Nombre", nombre)
+        if genere is not None:
+            mask &= self.codes["Genere"] == self.code("Genere", genere)
+        if pronouns:
+            mask &= self._isin("Pronombre", pronouns)
+        entry = (_readonly(np.flatnonzero(mask).astype(np.int32)), _readonly(mask))
+        self._cache.put(sig, entry)
+        return entry
+
+    def _isin(self, col: str, values) -> np.ndarray:
+        wanted = [self.code(col, v) for v in values]
+        return np.isin(self.codes[col], [c for c in wanted if c >= 0])
+
+    def candidates(self, modes=None, tiempos=None, nombre=None, genere=None, pronouns=None) -> np.ndarray:
+        """Ids de fila que pasan los filtros (cacheado por firma)."""
+        return self._resolve(self.signature(modes, tiempos, nombre, genere, pronouns))[0]
+
+    def candidate_mask(
+        self, modes=None, tiempos=None, nombre=None, genere=None, pronouns=None
+    ) -> np.ndarray:
+        """Máscara booleana de filas que pasan los filtros (cacheada por firma)."""
+        return self._resolve(self.signature(modes, tiempos, nombre, genere, pronouns))[1]
+
+    # ---------------------- opciones con preguntas ----------------------
+    def live_rows(self, verbs=None) -> np.ndarray:
+        """Máscara de filas con al menos una forma (entre ``verbs`` si se indican)."""
+        if not verbs:
+            return self.live
+        pos = [self.verb_pos[v] for v in verbs if v in self.verb_pos]
+        return ~self.missing[:, pos].all(axis=1)
+
+    def options(self, col: str, verbs=None, **filters) -> tuple:
+        """
+        Valores de ``col`` que dejan al menos una pregunta con el resto de los
+        filtros (el de la propia ``col`` se ignora), en orden de vocabulario.
+        La UI ofrece solo estos y así ningún filtro lleva a un pool vacío.
+        """
+        filters[FILTER_ARGS[col]] = None
+        key = ("options", col, self.signature(**filters), frozenset(verbs or ()))
+        hit = self._cache.get(key)
+        if hit is not None:
+            return hit
+        codes = self.codes[col][self.candidate_mask(**filters) & self.live_rows(verbs)]
+        present = np.bincount(codes[codes >= 0], minlength=len(self.vocab[col])) > 0
+        found = tuple(v for v, ok in zip(self.vocab[col], present) if ok)
+        self._cache.put(key, found)
+        return found
+
+    # ---------------------- muestreo ----------------------
+    def sample(self, candidates: np.ndarray, verbs, exclude=(), rng=random):
+        """
+        Elige uniformemente un par (fila, verbo) del espacio candidatos × verbos
+        sin las claves de ``exclude`` (tuplas tiempo, nombre, modo, pronombre,
+        verbo). Un único sorteo, sin reintentos; None si no queda ningún par.
+        """
+        drawn = self.sample_many(candidates, verbs, 1, exclude, rng)
+        return drawn[0] if drawn else None
+
+    def sample_many(self, candidates: np.ndarray, verbs, k: int, exclude=(), rng=random) -> list:
+        """
+        Hasta ``k`` pares (fila, verbo) distintos, uniformes y sin reemplazo,
+        con las mismas exclusiones que ``sample`` en un único sorteo.
+        """
+        verbs = [v for v in verbs if v in self.verb_pos]
+        n_verbs = len(verbs)
+        total = len(candidates) * n_verbs
+        if total == 0:
+            return []
+
+        verb_pos = {v: i for i, v in enumerate(verbs)}
+        blocked = set()
+        for tiempo, nombre, modo, pronombre, verb in exclude:
+            if verb not in verb_pos:
+                continue
+            rows = self.find(modo, tiempo, nombre, pronombre, genere=None)
+            for p in _positions(candidates, rows):
+                blocked.add(int(p) * n_verbs + verb_pos[verb])
+
+        if not self.complete:
+            sub = self.missing[np.ix_(candidates, [self.verb_pos[v] for v in verbs])]
+            blocked.update(np.flatnonzero(sub.ravel()).tolist())
+
+        free = total - len(blocked)
+        if free <= 0:
+            return []
+
+        # k-ésima posición libre = k + bloqueadas con menos de k libres antes
+        blocked = np.asarray(sorted(blocked), dtype=np.int64)
+        free_before = blocked - np.arange(len(blocked))
+        ranks = np.asarray(rng.sample(range(free), min(k, free)), dtype=np.int64)
+        flat = ranks + np.searchsorted(free_before, ranks, side="right")
+        return [(int(candidates[f // n_verbs]), verbs[f % n_verbs]) for f in flat]
+
+    # ---------------------- filas ----------------------
+    def record(self, row_id: int) -> dict:
+        """Reconstruye las columnas Modo/Tiempo/Nombre/Pronombre/Genere de una fila."""
+        row_id = int(row_id)
+        return {col: self.vocab[col][self.codes[col][row_id]] for col in INDEX_COLUMNS}
+
+    def has_verb(self, verb: str) -> bool:
+        return verb in self.verb_pos
+
+    def form(self, row_id: int, verb: str):
+        """Forma conjugada de ``verb`` en la fila (None si no existe)."""
+        code = self.forms[int(row_id), self.verb_pos[verb]]
+        if code >= 0:
+            return self.form_pool[code]
+        if verb in self._generated:
+            rec = self.record(row_id)
+            return self.conjugator.conjugate(verb, *(rec[c] for c in INDEX_COLUMNS))
+        return None
+
+    def verb_table(self, verb: str, row_ids: np.ndarray = None) -> pd.DataFrame:
+        """
+        Tabla de conjugación de un verbo (columnas del índice + Forma), ya en
+        orden de filas. Las formas del dataset salen de ``forms`` sin copiar
+        strings; solo los verbos generados pasan por el conjugador.
+        """
+        if row_ids is None:
+            row_ids = np.arange(self.size)
+        data = {
+            col: pd.Categorical.from_codes(self.codes[col][row_ids], categories=list(self.vocab[col]))
+            for col in INDEX_COLUMNS
+        }
+        if verb in self._generated:
+            data["Forma"] = [self.form(r, verb) for r in row_ids]
+        else:
+            data["Forma"] = pd.Categorical.from_codes(
+                self.forms[row_ids, self.verb_pos[verb]], categories=list(self.form_pool)
+            )
+        return pd.DataFrame(data).dropna(subset=["Forma"]).reset_index(drop=True)
+
+    def view(self, verb: str, modes=None, tiempos=None, nombre=None, genere=None, pronouns=None):
+        """
+        ``verb_table`` ya filtrada, guardada en la LRU de vistas por (verbo,
+        firma). La tabla es compartida entre sesiones: no modificarla.
+        """
+        key = (verb, self.signature(modes, tiempos, nombre, genere, pronouns))
+        hit = self._views.get(key)
+        if hit is None:
+            hit = self.verb_table(verb, self._resolve(key[1])[0])
+            self._views.put(key, hit)
+        return hit
+
+    def paradigm(self, verb: str, modes=None, tiempos=None, nombre=None, genere=None, pronouns=None):
+        """
+        Paradigma del verbo: pronombres × tiempos ("Modo · Nombre"), en el
+        orden del índice. Se guarda en la LRU de vistas igual que ``view``.
+        """
+        key = ("paradigm", verb, self.signature(modes, tiempos, nombre, genere, pronouns))
+        hit = self._views.get(key)
+        if hit is not None:
+            return hit
+
+        table = self.view(verb, modes, tiempos, nombre, genere, pronouns)
+        tense = table["Modo"].astype(str) + " · " + table["Nombre"].astype(str)
+        person = table["Pronombre"].astype(str)
+        if table["Genere"].nunique() > 1:
+            person = person + " (" + table["Genere"].astype(str) + ")"
+        hit = (
+            pd.DataFrame(
+                {
+                    "Persona": pd.Categorical(person, categories=person.unique()),
+                    "Tempo": pd.Categorical(tense, categories=tense.unique()),
+                    "Forma": table["Forma"].astype(object),
+                }
+            )
+            .pivot_table(index="Persona", columns="Tempo", values="Forma", aggfunc="first", observed=True)
+            .rename_axis(index=None, columns=None)
+        )
+        hit.index = hit.index.astype(str)
+        hit.columns = hit.columns.astype(str)
+        self._views.put(key, hit)
+        return hit
+
+
+def _ordered_codes(values: pd.Series) -> tuple:
+    """
+    Códigos y vocabulario de una columna: orden de las categorías si es una
+    categórica ordenada (solo las presentes), si no orden alfabético.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype) and values.cat.ordered:
+        values = values.cat.remove_unused_categories()
+        codes = values.cat.codes.to_numpy()
+        if not (codes < 0).any():
+            return codes, pd.Index(values.cat.categories.astype(str))
+    return pd.factorize(values.astype(str), sort=True)
+
+
+def _appearance_codes(values: pd.Series) -> tuple:
+    """
+    ``pd.factorize`` (orden de aparición) de una columna como strings. Si es
+    categórica se factorizan sus códigos enteros: no se crea un string por fila.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        if not (codes < 0).any():
+            codes, used = pd.factorize(codes)
+            return codes, pd.Index(values.cat.categories.astype(str)[used])
+    return pd.factorize(values.astype(str))
+
+
+def _positions(sorted_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Posiciones de ``ids`` dentro de ``sorted_ids`` (solo los presentes)."""
+    pos = np.searchsorted(sorted_ids, ids)
+    found = pos < len(sorted_ids)
+    found[found] = sorted_ids[pos[found]] == ids[found]
+    return pos[found]
+
+
+_EMPTY = _readonly(np.empty(0, dtype=np.int32))
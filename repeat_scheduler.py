@@ -0,0 +1,43 @@
+"""Cola de repetición de versiones anteriores: solo lectura, para migrarla.
+
+La cola de intervalo fijo se reemplazó por las tarjetas de ``card_model``. Un
+progreso guardado antes puede traerla en el snapshot (``repeat_queue``), en
+eventos ``repeat_*`` del journal o en la tabla ``repeat_items`` de SQLite. Los
+stores la leen una vez al cargar (``CardModel.absorb_repeat_queue`` la pasa a
+tarjetas) y la borran en el siguiente guardado; ya no se escribe.
+"""
+
+# Orden de los campos en la serialización compacta de progress.json
+REPEAT_FIELDS = [
+    "modo",
+    "tiempo",
+    "nombre",
+    "pronombre",
+    "genere",
+    "verb",
+    "correct",
+    "scheduled_at",
+    "interval",
+    "attempts",
+]
+
+
+def legacy_repeat_items(data) -> list:
+    """Items (dicts) desde el formato compacto ``{"fields", "items"}`` o la lista de dicts."""
+    if isinstance(data, dict):
+        fields = data.get("fields", REPEAT_FIELDS)
+        return [dict(zip(fields, row)) for row in data.get("items", [])]
+    return list(data or [])
+
+
+def replay_repeat_event(state: dict, ev: dict) -> None:
+    """Aplica a ``state["repeat_queue"]`` un evento ``repeat_*`` de un journal antiguo."""
+    op = ev.get("op")
+    if op == "repeat_reset":
+        state["repeat_queue"] = legacy_repeat_items(ev.get("queue"))
+        return
+    items = state.setdefault("repeat_queue", [])
+    if op == "repeat_push":
+        items.append(ev["item"])
+    elif op == "repeat_pop" and ev["item"] in items:
+        items.remove(ev["item"])
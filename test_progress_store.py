@@ -0,0 +1,75 @@
+"""Journal de progreso: recuperación de una línea final truncada y ``journal_seq``."""
+import json
+
+import pytest
+
+from history import RECORD_FIELDS
+from progress_store import JournalProgressStore
+
+
+def attempt(i: int) -> dict:
+    item = {f: None for f in RECORD_FIELDS}
+    item.update(verb="amare", pronombre="Io", provided=f"r{i}", correct="amo", is_repeat=False, ts=float(i))
+    return item
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "progress.json"), str(tmp_path / "progress.jsonl")
+
+
+def answered(store: JournalProgressStore, n: int) -> dict:
+    state = store.load()
+    state.setdefault("session_corrects", [])
+    for i in range(n):
+        state["session_corrects"].append(attempt(i))
+        state["score"] = i + 1
+        store.save(state)
+    return state
+
+
+def test_truncated_trailing_line_is_dropped(paths):
+    answered(JournalProgressStore(*paths), 3)
+    with open(paths[1], "rb") as f:
+        valid = f.read()
+    with open(paths[1], "ab") as f:
+        f.write(b'{"op":"append","key":"session_co')  # corte a mitad de escritura
+
+    store = JournalProgressStore(*paths)
+    state = store.load()
+    assert [it["provided"] for it in state["session_corrects"]] == ["r0", "r1", "r2"]
+    assert state["score"] == 3
+    with open(paths[1], "rb") as f:
+        assert f.read() == valid  # el resto truncado se recorta del archivo
+
+    # Lo que se escribe después queda en líneas válidas
+    state["session_corrects"].append(attempt(3))
+    store.save(state)
+    reloaded = JournalProgressStore(*paths).load()
+    assert len(reloaded["session_corrects"]) == 4
+
+
+def test_events_already_in_the_snapshot_are_skipped(paths):
+    store = JournalProgressStore(*paths)
+    state = answered(store, 3)
+    with open(paths[1], "rb") as f:
+        old_journal = f.read()
+    store.compact(state)
+    with open(paths[0], encoding="utf-8") as f:
+        seq = json.load(f)["journal_seq"]
+    assert seq > 0
+
+    # Corte entre el snapshot y el vaciado del journal: vuelven los eventos viejos
+    with open(paths[1], "wb") as f:
+        f.write(old_journal)
+    state = JournalProgressStore(*paths).load()
+    assert [it["provided"] for it in state["session_corrects"]] == ["r0", "r1", "r2"]
+
+    # Los eventos posteriores al snapshot sí se aplican
+    store = JournalProgressStore(*paths)
+    state = store.load()
+    state["session_corrects"].append(attempt(3))
+    store.save(state)
+    reloaded = JournalProgressStore(*paths).load()
+    assert [it["provided"] for it in reloaded["session_corrects"]] == ["r0", "r1", "r2", "r3"]
+    assert reloaded["score"] == 3
@@ -0,0 +1,84 @@
+"""Sorteo de ``QuestionIndex.sample_many``: posición libre de cada rango y exclusiones."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quiz_index import QuestionIndex
+
+VERBS = ["amare", "credere", "dormire"]
+PRONOUNS = ["Io", "Tu", "Lui"]
+TENSES = [("Indicativo", "Presente", "Presente"), ("Indicativo", "Passato", "Imperfetto")]
+
+
+@pytest.fixture
+def index():
+    rows = []
+    for verb in VERBS:
+        for modo, tiempo, nombre in TENSES:
+            for pronombre in PRONOUNS:
+                # Un hueco: sin forma para dormire / Imperfetto / Tu
+                if verb == "dormire" and nombre == "Imperfetto" and pronombre == "Tu":
+                    continue
+                rows.append([verb, modo, tiempo, nombre, pronombre, "M", f"{verb}-{nombre}-{pronombre}"])
+    df = pd.DataFrame(rows, columns=["Verbo", "Modo", "Tiempo", "Nombre", "Pronombre", "Genere", "Forma"])
+    return QuestionIndex(df)
+
+
+class IdentityRng:
+    """``sample`` devuelve los rangos en orden: el resultado enumera las posiciones libres."""
+
+    def sample(self, population, k):
+        return list(population)[:k]
+
+
+def free_pairs(index, candidates, verbs, exclude=()):
+    """Pares libres en orden plano (fila, verbo), calculados por fuerza bruta."""
+    excluded = set()
+    for tiempo, nombre, modo, pronombre, verb in exclude:
+        for row in index.find(modo, tiempo, nombre, pronombre, genere=None):
+            excluded.add((int(row), verb))
+    return [
+        (int(row), verb)
+        for row in candidates
+        for verb in verbs
+        if index.form(row, verb) is not None and (int(row), verb) not in excluded
+    ]
+
+
+def test_ranks_map_to_free_positions_in_order(index):
+    candidates = index.candidates()
+    exclude = [("Presente", "Presente", "Indicativo", "Io", "credere")]
+    expected = free_pairs(index, candidates, VERBS, exclude)
+    drawn = index.sample_many(candidates, VERBS, len(expected), exclude, IdentityRng())
+    assert drawn == expected
+
+
+def test_blocked_pairs_are_never_drawn(index):
+    candidates = index.candidates()
+    exclude = [
+        ("Presente", "Presente", "Indicativo", "Io", "amare"),
+        ("Passato", "Imperfetto", "Indicativo", "Lui", "dormire"),
+    ]
+    expected = set(free_pairs(index, candidates, VERBS, exclude))
+    for seed in range(20):
+        drawn = index.sample_many(candidates, VERBS, 100, exclude, random.Random(seed))
+        assert len(drawn) == len(set(drawn)) == len(expected)
+        assert set(drawn) == expected
+
+
+def test_fixed_seed_is_reproducible_and_bounded(index):
+    candidates = index.candidates()
+    first = index.sample_many(candidates, VERBS, 5, rng=random.Random(7))
+    again = index.sample_many(candidates, VERBS, 5, rng=random.Random(7))
+    assert first == again
+    assert len(first) == 5 and len(set(first)) == 5
+    assert set(first) <= set(free_pairs(index, candidates, VERBS))
+
+
+def test_nothing_free_returns_empty(index):
+    candidates = index.candidates()
+    exclude = [(t, n, m, p, v) for m, t, n in TENSES for p in PRONOUNS for v in VERBS]
+    assert index.sample_many(candidates, VERBS, 3, exclude, random.Random(0)) == []
+    assert index.sample_many(np.empty(0, dtype=np.int32), VERBS, 3) == []